@@ -0,0 +1,75 @@
+import bpy
+
+# Divide uma lista ordenada de frames em sequências aritméticas (início, fim, passo), cada uma
+# renderizável com uma única chamada render(animation=True) usando frame_start/frame_end/frame_step
+def arithmetic_runs(frames):
+    runs = []
+    index = 0
+    while index < len(frames):
+        start = frames[index]
+        if index + 1 == len(frames):
+            runs.append((start, start, 1))
+            break
+        step = frames[index + 1] - start
+        end_index = index + 1
+        while end_index + 1 < len(frames) and frames[end_index + 1] - frames[end_index] == step:
+            end_index += 1
+        runs.append((start, frames[end_index], step))
+        index = end_index + 1
+    return runs
+
+# Grava as variações de cada frame como keyframes e renderiza a sequência de uma vez,
+# evitando o custo de despacho do operador e de sincronização da cena a cada imagem
+class AnimationBaker:
+    def __init__(self, scene=None):
+        self.scene = scene if scene is not None else bpy.context.scene
+        # Para cada id_data chaveado: (animation_data criado pelo baker, action e slot anteriores, action do baker)
+        self.baked = {}
+
+    # Os keyframes vão para uma action nova, só do baker; a action que o objeto já tinha é guardada
+    # e volta em clear(), sem perder keyframes, drivers ou trilhas NLA da cena
+    def take_over(self, id_data):
+        animation_data = id_data.animation_data
+        created = animation_data is None
+        if created:
+            animation_data = id_data.animation_data_create()
+        previous_action = animation_data.action
+        previous_slot = getattr(animation_data, "action_slot", None)
+        action = bpy.data.actions.new(f"{id_data.name}_bake")
+        animation_data.action = action
+        return created, previous_action, previous_slot, action
+
+    # Use this function to key the current value of the given properties at a frame
+    def key(self, id_data, data_paths, frame):
+        if id_data not in self.baked:
+            self.baked[id_data] = self.take_over(id_data)
+        for data_path in data_paths:
+            id_data.keyframe_insert(data_path=data_path, frame=frame)
+
+    # Use this function to render the baked frames; filepath_prefix recebe o número do frame com 4 dígitos
+    def render(self, frames, filepath_prefix):
+        scene = self.scene
+        previous = (scene.frame_start, scene.frame_end, scene.frame_step, scene.render.filepath)
+
+        scene.render.filepath = filepath_prefix
+        for start, end, step in arithmetic_runs(sorted(frames)):
+            scene.frame_start = start
+            scene.frame_end = end
+            scene.frame_step = step
+            bpy.ops.render.render(animation=True)
+
+        scene.frame_start, scene.frame_end, scene.frame_step, scene.render.filepath = previous
+
+    # Use this function to remove the baked keyframes so the scene returns to per-frame mode:
+    # only the baker actions are removed and the previous actions are assigned again
+    def clear(self):
+        for id_data, (created, previous_action, previous_slot, action) in self.baked.items():
+            animation_data = id_data.animation_data
+            if animation_data is not None:
+                animation_data.action = previous_action
+                if previous_slot is not None and previous_action is not None:
+                    animation_data.action_slot = previous_slot
+                if created and len(animation_data.drivers) == 0 and len(animation_data.nla_tracks) == 0:
+                    id_data.animation_data_clear()
+            bpy.data.actions.remove(action)
+        self.baked = {}
@@ -0,0 +1,206 @@
+import numpy as np
+
+# Monta a matriz 3x4 que leva um ponto do mundo para (x * z, y * z, z) (ou (x, y, z) na câmera ortográfica),
+# em que (x, y, z) é o mesmo resultado de bpy_extras.object_utils.world_to_camera_view
+def view_projection_matrix(camera_matrix_world, view_frame, ortho=False):
+    # world_to_camera_view usa a matriz da câmera normalizada (sem escala)
+    camera_matrix = np.array(camera_matrix_world, dtype=np.float64)
+    camera_matrix[:3, :3] /= np.linalg.norm(camera_matrix[:3, :3], axis=0)
+    view = np.linalg.inv(camera_matrix)
+
+    # Cantos do frame da câmera: 0 = superior direito, 1 = inferior direito, 2 = inferior esquerdo
+    frame = np.array(view_frame, dtype=np.float64)
+    min_x, max_x = frame[2][0], frame[1][0]
+    min_y, max_y = frame[1][1], frame[0][1]
+    width = max_x - min_x
+    height = max_y - min_y
+
+    if ortho:
+        # Sem perspectiva: x e y já saem normalizados e project_points não divide por z
+        projection = np.array([
+            [1 / width, 0, 0, -min_x / width],
+            [0, 1 / height, 0, -min_y / height],
+            [0, 0, -1, 0],
+        ])
+    else:
+        depth = -frame[0][2]
+        projection = np.array([
+            [depth / width, 0, min_x / width, 0],
+            [0, depth / height, min_y / height, 0],
+            [0, 0, -1, 0],
+        ])
+    return projection @ view
+
+# Projeta pontos homogêneos (n, 4) do mundo em coordenadas normalizadas da câmera (n, 3)
+def project_points(view_projection, points, ortho=False):
+    projected = points @ view_projection.T
+    if ortho:
+        return projected
+
+    z = projected[:, 2]
+    behind = z == 0.0
+    safe_z = np.where(behind, 1.0, z)
+    result = np.column_stack([projected[:, 0] / safe_z, projected[:, 1] / safe_z, z])
+    # world_to_camera_view retorna (0.5, 0.5, 0) para pontos no plano da câmera
+    result[behind, :2] = 0.5
+    return result
+
+# Use this function to get a hashable summary of the mesh and the modifiers of an object: the cached vertices
+# are read again when a modifier is added, removed, toggled or has one of its settings changed
+def modifier_signature(obj):
+    modifiers = []
+    for modifier in obj.modifiers:
+        settings = []
+        for prop in modifier.bl_rna.properties:
+            if prop.is_readonly or prop.type not in ('BOOLEAN', 'INT', 'FLOAT', 'ENUM', 'STRING', 'POINTER'):
+                continue
+            value = getattr(modifier, prop.identifier)
+            if prop.type == 'POINTER':
+                value = None if value is None else value.name
+            elif getattr(prop, "array_length", 0) > 0:
+                value = tuple(value)
+            elif isinstance(value, set):
+                value = tuple(sorted(value))
+            settings.append((prop.identifier, value))
+        modifiers.append((modifier.type, tuple(settings)))
+    return (obj.data.as_pointer(), tuple(modifiers))
+
+class BoundingBoxProjector:
+    # mode="bound_box" projeta os 8 cantos de obj.bound_box; mode="vertices" projeta os vértices
+    # reais da malha (reduzidos ao fecho convexo), dando caixas justas para objetos finos e rotacionados
+    def __init__(self, scene, mode="bound_box", use_hull=True):
+        if mode not in ("bound_box", "vertices"):
+            raise ValueError("mode deve ser 'bound_box' ou 'vertices'.")
+        self.scene = scene
+        self.mode = mode
+        self.use_hull = use_hull
+        self.view_projection = None
+        self.ortho = False
+        # Vértices locais (n, 4) de cada objeto, lidos da malha avaliada e relidos quando os modificadores mudam
+        self.vertex_cache = {}
+
+    # Use this function once per frame, after the camera has been moved
+    def update_camera(self):
+        cam = self.scene.camera
+        self.ortho = cam.data.type == 'ORTHO'
+        frame = [tuple(v) for v in cam.data.view_frame(scene=self.scene)[:3]]
+        self.view_projection = view_projection_matrix(cam.matrix_world, frame, self.ortho)
+        return self.view_projection
+
+    # Cantos da bounding box de todos os objetos, no mundo, em um único array (n_objetos, 8, 4)
+    def world_corners(self, objects):
+        local = np.array([obj.bound_box for obj in objects], dtype=np.float64)
+        local = np.concatenate([local, np.ones(local.shape[:2] + (1,))], axis=2)
+        matrices = np.array([obj.matrix_world for obj in objects], dtype=np.float64)
+        return local @ matrices.transpose(0, 2, 1)
+
+    # Use this function to get the cached local vertices (homogeneous) of a mesh object, with its modifiers applied
+    def local_vertices(self, obj):
+        signature = modifier_signature(obj)
+        cached = self.vertex_cache.get(obj.name)
+        if cached is None or cached[0] != signature:
+            import bpy
+
+            # A malha avaliada (depois dos modificadores: mirror, solidify, array, ...) é a que aparece no render
+            evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+            mesh = evaluated.to_mesh()
+            try:
+                coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+                mesh.vertices.foreach_get("co", coords)
+            finally:
+                evaluated.to_mesh_clear()
+            coords = coords.reshape(-1, 3).astype(np.float64)
+            if len(coords) == 0:
+                coords = np.array(obj.bound_box, dtype=np.float64)
+
+            # Os extremos da projeção de um conjunto convexo estão nos vértices do fecho
+            if self.use_hull and len(coords) > 8:
+                coords = convex_hull_vertices(coords)
+
+            cached = (signature, np.concatenate([coords, np.ones((len(coords), 1))], axis=1))
+            self.vertex_cache[obj.name] = cached
+        return cached[1]
+
+    # Use this function when a mesh is edited (or deformed by another object, e.g. an armature) and its cached vertices are no longer valid
+    def clear_cache(self):
+        self.vertex_cache = {}
+
+    def projected_points(self, objects):
+        if self.mode == "bound_box":
+            corners = self.world_corners(objects)
+            projected = project_points(self.view_projection, corners.reshape(-1, 4), self.ortho)
+            return projected.reshape(len(objects), -1, 3)
+
+        # Cada objeto tem um número diferente de vértices: a matriz do objeto é combinada com a
+        # da câmera (3x4) e aplicada direto aos vértices locais em cache
+        projected = []
+        for obj in objects:
+            if obj.type != 'MESH' or len(obj.data.vertices) == 0:
+                local = np.concatenate([np.array(obj.bound_box, dtype=np.float64), np.ones((8, 1))], axis=1)
+            else:
+                local = self.local_vertices(obj)
+            object_projection = self.view_projection @ np.array(obj.matrix_world, dtype=np.float64)
+            projected.append(project_points(object_projection, local, self.ortho))
+        return projected
+
+    # Use this function to get one pixel box (min_x, min_y, max_x, max_y) per object with a single projection
+    def get_bounding_boxes(self, objects, update_camera=True):
+        if update_camera or self.view_projection is None:
+            self.update_camera()
+
+        resolution = np.array([self.scene.render.resolution_x, self.scene.render.resolution_y], dtype=np.float64)
+        projected = self.projected_points(objects)
+        if self.mode == "bound_box":
+            mins = projected[:, :, :2].min(axis=1)
+            maxs = projected[:, :, :2].max(axis=1)
+        else:
+            mins = np.array([points[:, :2].min(axis=0) for points in projected])
+            maxs = np.array([points[:, :2].max(axis=0) for points in projected])
+        return np.concatenate([mins * resolution, maxs * resolution], axis=1)
+
+    # Use this function to get the box containing all objects, same result as the per-corner path
+    def get_bounding_box(self, objects, update_camera=True):
+        if not objects:
+            return None
+        boxes = self.get_bounding_boxes(objects, update_camera)
+        min_x, min_y = boxes[:, :2].min(axis=0)
+        max_x, max_y = boxes[:, 2:].max(axis=0)
+        return (float(min_x), float(min_y), float(max_x), float(max_y))
+
+# Reduz os vértices ao fecho convexo usando o bmesh do Blender (executado uma vez por malha)
+def convex_hull_vertices(coords):
+    import bmesh
+
+    bm = bmesh.new()
+    for co in coords:
+        bm.verts.new(co)
+    result = bmesh.ops.convex_hull(bm, input=bm.verts)
+    interior = set(result["geom_interior"]) | set(result["geom_unused"])
+    hull = np.array([v.co[:] for v in bm.verts if v not in interior], dtype=np.float64)
+    bm.free()
+
+    # Malhas planas ou degeneradas não formam fecho: mantém todos os vértices
+    if len(hull) < 4:
+        return coords
+    return hull
+
+# Use this function to get the fraction of a pixel box (min_x, min_y, max_x, max_y) that lies inside the image
+def box_visibility(box, resolution_x, resolution_y):
+    min_x, min_y, max_x, max_y = box
+    area = (max_x - min_x) * (max_y - min_y)
+    if area <= 0:
+        return 0.0
+    visible_w = max(0.0, min(max_x, resolution_x) - max(min_x, 0.0))
+    visible_h = max(0.0, min(max_y, resolution_y) - max(min_y, 0.0))
+    return visible_w * visible_h / area
+
+# Pose aceita quando o centro da caixa está na imagem e a parte visível atinge min_visibility
+def is_box_accepted(box, resolution_x, resolution_y, min_visibility=0.0):
+    if box is None:
+        return False
+    min_x, min_y, max_x, max_y = box
+    x_center = (min_x + max_x) / 2
+    y_center = (min_y + max_y) / 2
+    if not (0 <= x_center <= resolution_x and 0 <= y_center <= resolution_y):
+        return False
+    return box_visibility(box, resolution_x, resolution_y) >= min_visibility
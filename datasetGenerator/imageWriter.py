@@ -0,0 +1,189 @@
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Escrita das imagens e anotações em segundo plano: o laço lê os pixels do Render Result
+# (pelo nó Viewer do compositor) e uma pool de threads codifica o PNG enquanto o próximo frame renderiza.
+# NumPy e zlib liberam o GIL nas partes pesadas, então threads bastam (sem copiar os pixels entre processos).
+
+VIEWER_IMAGE = "Viewer Node"
+
+# True when the Viewer pixels (linear) can be turned into the saved colours by to_display: sRGB display with the
+# Standard (or Raw) view transform, no look and no curves. Otherwise (AgX, Filmic, looks, ...) the colour image
+# is written by Blender itself with save_render, and only the object index is taken from the Viewer
+def viewer_matches_display(scene):
+    view_settings = scene.view_settings
+    return (
+        scene.display_settings.display_device == "sRGB"
+        and view_settings.view_transform in ("Standard", "Raw")
+        and view_settings.look in ("None", "")
+        and not view_settings.use_curve_mapping
+    )
+
+# Use this function once before rendering; links a Viewer node to the Render Layers so the
+# rendered pixels are available in bpy.data.images["Viewer Node"]. The colour management of the scene is not changed
+def prepare_viewer(scene):
+    scene.use_nodes = True
+    tree = scene.node_tree
+    render_layers = next((node for node in tree.nodes if node.type == "R_LAYERS"), None)
+    if render_layers is None:
+        render_layers = tree.nodes.new("CompositorNodeRLayers")
+    viewer = next((node for node in tree.nodes if node.type == "VIEWER"), None)
+    if viewer is None:
+        viewer = tree.nodes.new("CompositorNodeViewer")
+    tree.links.new(render_layers.outputs["Image"], viewer.inputs["Image"])
+
+# Use this function right after bpy.ops.render.render(); returns a float32 (height, width, 4) array, top row first
+def read_render_pixels(scene):
+    import bpy
+
+    image = bpy.data.images[VIEWER_IMAGE]
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, 4)[::-1]
+
+# Use this function to capture the scene settings the workers need, so they never touch bpy;
+# with a Letterbox that pads, the borders are added before encoding. frame_index seeds the dither, so the same
+# frame always gets the same pixels. With "blender_color" (formats other than PNG or colour management that
+# to_display does not reproduce) the colour image is saved with save_blender_color and the workers skip it
+def encode_settings(scene, letterbox=None, frame_index=0):
+    image_settings = scene.render.image_settings
+    # Só o PNG tem codificador sem dependências fora do Blender (NumPy + zlib)
+    blender_color = image_settings.file_format != "PNG" or not viewer_matches_display(scene)
+    pads = letterbox is not None and letterbox.pads
+    if blender_color and pads:
+        raise ValueError(
+            f"As bordas do letterbox são adicionadas aos pixels do render, o que exige PNG e a transformação Standard ou Raw "
+            f"(atual: {image_settings.file_format}, {scene.view_settings.view_transform}); remova --letterbox ou use --no-letterbox."
+        )
+    return {
+        "blender_color": blender_color,
+        "color_mode": image_settings.color_mode,
+        "color_depth": int(image_settings.color_depth),
+        "level": round(image_settings.compression * 9 / 100),
+        "raw": scene.view_settings.view_transform == "Raw",
+        "exposure": scene.view_settings.exposure,
+        "gamma": scene.view_settings.gamma,
+        "dither": scene.render.dither_intensity,
+        "dither_seed": frame_index,
+        "letterbox": letterbox if pads else None,
+    }
+
+# Use this function right after the render, in the main thread: saves the colour image with Blender when the
+# workers cannot encode it (see encode_settings)
+def save_blender_color(image_path, settings):
+    import bpy
+
+    if settings["blender_color"]:
+        bpy.data.images["Render Result"].save_render(filepath=image_path)
+
+# Converte os pixels lineares em float para sRGB com 8 ou 16 bits (RGB ou RGBA conforme color_mode)
+def to_display(pixels, settings):
+    color = pixels[..., :3] * (2.0 ** settings["exposure"])
+    color = np.clip(color, 0.0, 1.0)
+    if not settings["raw"]:
+        color = np.where(color <= 0.0031308, color * 12.92, 1.055 * np.power(color, 1 / 2.4) - 0.055)
+    if settings["gamma"] != 1.0:
+        color = np.power(color, 1 / settings["gamma"])
+
+    if settings["color_mode"] == "RGBA":
+        color = np.concatenate([color, np.clip(pixels[..., 3:4], 0.0, 1.0)], axis=2)
+    elif settings["color_mode"] == "BW":
+        color = color @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+    if settings.get("color_depth", 8) == 16:
+        return (color * 65535.0 + 0.5).astype(np.uint16)
+    # Dither como o do Blender na conversão para 8 bits: ruído de até dither/255 antes de quantizar
+    if settings.get("dither"):
+        color = color + (np.random.default_rng(settings.get("dither_seed", 0)).random(color.shape, dtype=np.float32) - 0.5) * (settings["dither"] / 255.0)
+        color = np.clip(color, 0.0, 1.0)
+    return (color * 255.0 + 0.5).astype(np.uint8)
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+# Use this function to encode a uint8 or uint16 (height, width[, channels]) array as PNG; every row
+# uses the Up filter, computed for the whole image at once
+def encode_png(image, level=6):
+    if image.ndim == 2:
+        image = image[..., None]
+    height, width, channels = image.shape
+    color_type = {1: 0, 3: 2, 4: 6}[channels]
+    bit_depth = 16 if image.dtype == np.uint16 else 8
+
+    # O PNG guarda 16 bits em big-endian; os filtros trabalham sobre os bytes
+    rows = np.ascontiguousarray(image, dtype=">u2" if bit_depth == 16 else np.uint8).view(np.uint8).reshape(height, -1)
+    filtered = np.empty((height, rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[0, 1:] = rows[0]
+    filtered[1:, 1:] = rows[1:] - rows[:-1]
+
+    header = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", header)
+        + png_chunk(b"IDAT", zlib.compress(filtered.tobytes(), level))
+        + png_chunk(b"IEND", b"")
+    )
+
+# Escreve em um arquivo temporário e renomeia, para que um arquivo interrompido nunca pareça completo
+def write_atomic(path, data):
+    temporary_path = f"{path}.tmp"
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(temporary_path, mode) as f:
+        f.write(data)
+    os.replace(temporary_path, path)
+
+# Use this function as the job of AsyncImageWriter: encodes the pixels and writes the image and the annotation
+# (only the annotation when the image was saved by Blender, see save_blender_color)
+def write_frame(image_path, pixels, settings, annotation_path=None, annotation_line=None):
+    if not settings.get("blender_color"):
+        image = to_display(pixels, settings)
+        if settings.get("letterbox") is not None:
+            image = settings["letterbox"].pad_image(image)
+        write_atomic(image_path, encode_png(image, settings["level"]))
+    if annotation_path is not None and annotation_line is not None:
+        write_atomic(annotation_path, annotation_line)
+
+# Pool limitada de escrita: submit bloqueia quando há max_pending frames na fila (backpressure),
+# para que a memória não cresça quando o disco ou a codificação forem mais lentos que o render
+class AsyncImageWriter:
+    def __init__(self, workers=2, max_pending=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-writer")
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+        self.pending = deque()
+        self.finished = []
+
+    # Use this function to queue a job; key is returned by completed() once the job has been written
+    def submit(self, key, function, *args, **kwargs):
+        while len(self.pending) >= self.max_pending:
+            self.wait_oldest()
+        self.pending.append((key, self.executor.submit(function, *args, **kwargs)))
+
+    def wait_oldest(self):
+        key, future = self.pending.popleft()
+        # Repassa ao laço principal qualquer erro de escrita
+        future.result()
+        self.finished.append(key)
+
+    # Use this function to get the keys of the jobs already written, in submission order
+    def completed(self):
+        while self.pending and self.pending[0][1].done():
+            self.wait_oldest()
+        keys, self.finished = self.finished, []
+        return keys
+
+    # Use this function to wait for every queued job; returns the keys not yet returned by completed()
+    def flush(self):
+        while self.pending:
+            self.wait_oldest()
+        return self.completed()
+
+    def close(self):
+        keys = self.flush()
+        self.executor.shutdown()
+        return keys
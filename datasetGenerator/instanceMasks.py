@@ -0,0 +1,334 @@
+import os
+import json
+import threading
+
+import numpy as np
+
+from imageWriter import encode_png, write_atomic, write_frame
+
+# Máscaras por instância a partir do passe Object Index do mesmo render. O índice de cada pixel
+# (obj.pass_index) é dividido por 255 e gravado no alfa da imagem do nó Viewer, então read_render_pixels
+# traz a cor e o índice de uma vez, sem um segundo render nem um arquivo EXR extra.
+
+INDEX_SCALE = 255.0
+
+# Use this function after imageWriter.prepare_viewer; routes the Object Index pass into the Viewer alpha
+def prepare_index_pass(scene):
+    # Só o Cycles produz o passe Object Index; com outro motor a saída IndexOB fica vazia e as máscaras também
+    if scene.render.engine != "CYCLES":
+        raise ValueError(f"Máscaras e caixas visíveis exigem o Cycles (motor atual: {scene.render.engine}); use --profile draft, train ou hero.")
+    scene.view_layers[0].use_pass_object_index = True
+    tree = scene.node_tree
+    render_layers = next(node for node in tree.nodes if node.type == "R_LAYERS")
+    viewer = next(node for node in tree.nodes if node.type == "VIEWER")
+
+    divide = next((node for node in tree.nodes if node.name == "Object Index Scale"), None)
+    if divide is None:
+        divide = tree.nodes.new("CompositorNodeMath")
+        divide.name = "Object Index Scale"
+        divide.operation = "DIVIDE"
+        divide.inputs[1].default_value = INDEX_SCALE
+    set_alpha = next((node for node in tree.nodes if node.name == "Object Index Alpha"), None)
+    if set_alpha is None:
+        set_alpha = tree.nodes.new("CompositorNodeSetAlpha")
+        set_alpha.name = "Object Index Alpha"
+        # Replace Alpha mantém o RGB sem pré-multiplicar
+        if hasattr(set_alpha, "mode"):
+            set_alpha.mode = "REPLACE_ALPHA"
+
+    tree.links.new(render_layers.outputs["IndexOB"], divide.inputs[0])
+    tree.links.new(render_layers.outputs["Image"], set_alpha.inputs["Image"])
+    tree.links.new(divide.outputs[0], set_alpha.inputs["Alpha"])
+    tree.links.new(set_alpha.outputs["Image"], viewer.inputs["Image"])
+
+# Use this function to give every object of an instance the same pass index (0 is the background)
+def assign_pass_indices(instances):
+    for instance_id, objects in instances:
+        for obj in objects:
+            obj.pass_index = instance_id
+
+# Separa o índice do alfa; a imagem volta a ter alfa 1 (o passe substitui a transparência do filme)
+def split_index(pixels):
+    index_map = np.rint(pixels[..., 3] * INDEX_SCALE).astype(np.uint8)
+    color = pixels.copy()
+    color[..., 3] = 1.0
+    return color, index_map
+
+# Use this function to get the tight (x_min, y_min, x_max, y_max) pixel box of a mask, origin at the top, or None if empty
+def mask_box(mask):
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
+        return None
+    columns = np.flatnonzero(mask.any(axis=0))
+    return columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+
+# Arestas entre pixels da máscara e de fora dela, orientadas com a máscara à direita (y para baixo).
+# Retorna início, fim e direção (0: +x, 1: +y, 2: -x, 3: -y) de cada aresta
+def boundary_edges(mask):
+    padded = np.pad(mask, 1)
+    inside = padded[1:-1, 1:-1]
+    starts, directions = [], []
+    # Topo, direita, base e esquerda de cada pixel da máscara
+    for direction, neighbour, offset in (
+        (0, padded[:-2, 1:-1], (0, 0)),
+        (1, padded[1:-1, 2:], (1, 0)),
+        (2, padded[2:, 1:-1], (1, 1)),
+        (3, padded[1:-1, :-2], (0, 1)),
+    ):
+        rows, columns = np.nonzero(inside & ~neighbour)
+        starts.append(np.stack([columns + offset[0], rows + offset[1]], axis=1))
+        directions.append(np.full(len(rows), direction))
+    starts = np.concatenate(starts)
+    directions = np.concatenate(directions)
+    steps = np.array([(1, 0), (0, 1), (-1, 0), (0, -1)])
+    return starts, starts + steps[directions], directions
+
+# Use this function to extract the closed contours of a mask as (n, 2) vertex arrays (x, y in pixel corners)
+def mask_contours(mask):
+    starts, ends, directions = boundary_edges(mask)
+    if len(starts) == 0:
+        return []
+
+    # Sucessor de cada aresta: a aresta que sai do seu fim, preferindo virar à direita
+    # (separa pixels que só se tocam pela diagonal)
+    width = int(max(starts[:, 0].max(), ends[:, 0].max())) + 2
+    codes = (starts[:, 1] * width + starts[:, 0]) * 4 + directions
+    order = np.argsort(codes)
+    sorted_codes = codes[order]
+    end_keys = (ends[:, 1] * width + ends[:, 0]) * 4
+    successor = np.full(len(starts), -1)
+    for turn in (1, 0, 3):
+        wanted = end_keys + (directions + turn) % 4
+        position = np.minimum(np.searchsorted(sorted_codes, wanted), len(sorted_codes) - 1)
+        found = (sorted_codes[position] == wanted) & (successor < 0)
+        successor[found] = order[position[found]]
+
+    # Cada aresta tem exatamente um sucessor, então as arestas formam ciclos disjuntos (uma permutação).
+    # Os ciclos são separados por saltos de ponteiro, sem percorrer aresta por aresta: em log2(n) rodadas
+    # cada aresta recebe o menor índice do seu ciclo (o rótulo) e a distância até o fim do ciclo
+    count = len(starts)
+    successor = np.where(successor < 0, np.arange(count), successor)
+    rounds = max(1, int(np.ceil(np.log2(count))) + 1)
+    label = np.arange(count)
+    jump = successor
+    for _ in range(rounds):
+        label = np.minimum(label, label[jump])
+        jump = jump[jump]
+
+    # Distância de cada aresta até a última do ciclo (a que volta ao rótulo), por list ranking
+    last = successor == label
+    remaining = np.where(last, 0, 1)
+    jump = np.where(last, np.arange(count), successor)
+    for _ in range(rounds):
+        remaining = remaining + remaining[jump]
+        jump = jump[jump]
+
+    # Arestas em ordem de ciclo a partir do rótulo; só os cantos (mudança de direção) entram no polígono
+    order = np.lexsort((-remaining, label))
+    predecessor = np.empty(count, dtype=np.int64)
+    predecessor[successor] = np.arange(count)
+    corners = directions[order] != directions[predecessor[order]]
+    boundaries = np.flatnonzero(np.diff(label[order])) + 1
+    return [
+        starts[cycle[keep]]
+        for cycle, keep in zip(np.split(order, boundaries), np.split(corners, boundaries))
+    ]
+
+def polygon_area(points):
+    x, y = points[:, 0].astype(np.float64), points[:, 1].astype(np.float64)
+    return 0.5 * (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+# Use this function to get the outer contour of the largest part of the mask, with at most max_points vertices
+def mask_polygon(mask, max_points=100):
+    contours = mask_contours(mask)
+    if not contours:
+        return None
+    # Contornos externos têm área positiva com a máscara à direita; buracos têm área negativa
+    polygon = max(contours, key=polygon_area)
+    if len(polygon) > max_points:
+        polygon = polygon[np.linspace(0, len(polygon), max_points, endpoint=False).astype(int)]
+    return polygon
+
+# Converte pixels da imagem renderizada para coordenadas normalizadas da imagem final (com o letterbox, se houver)
+def normalize_points(points, render_width, render_height, letterbox=None):
+    points = np.asarray(points, dtype=np.float64)
+    if letterbox is None:
+        return points / (render_width, render_height)
+    return (points + (letterbox.left, letterbox.top)) / (letterbox.width, letterbox.height)
+
+# Use this function to get, in a single pass over the index map, the pixel count and the visible box
+# (x_min, y_min, x_max, y_max, origin at the top) of every object index from 1 to count; empty objects get count 0
+def visible_extents(index_map, count):
+    height, width = index_map.shape
+    # Índices fora de 1..count (outros objetos) contam como fundo
+    ids = np.where(index_map <= count, index_map, 0).astype(np.int64)
+    # Pixels de cada objeto por linha e por coluna, com um bincount em cada eixo
+    row_counts = np.bincount((ids * height + np.arange(height)[:, None]).ravel(), minlength=(count + 1) * height).reshape(count + 1, height)
+    column_counts = np.bincount((ids * width + np.arange(width)).ravel(), minlength=(count + 1) * width).reshape(count + 1, width)
+    rows, columns = row_counts > 0, column_counts > 0
+
+    pixel_counts = row_counts.sum(axis=1)
+    boxes = np.stack([
+        columns.argmax(axis=1),
+        rows.argmax(axis=1),
+        width - columns[:, ::-1].argmax(axis=1),
+        height - rows[:, ::-1].argmax(axis=1),
+    ], axis=1)
+    return pixel_counts[1:], boxes[1:]
+
+def box_area(box):
+    return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+# Caixa que contém as caixas dadas (x_min, y_min, x_max, y_max)
+def union_box(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64)
+    return (*boxes[:, :2].min(axis=0), *boxes[:, 2:].max(axis=0))
+
+# Direções usadas para o contorno convexo: múltiplo de 4, para que os extremos em x e y estejam entre os pontos de apoio
+OUTLINE_DIRECTIONS = 128
+
+# Use this function to get the convex outline (k, 2) of projected points: the support point of the set in each of
+# OUTLINE_DIRECTIONS directions, in angular order. It is a polygon inscribed in the convex hull, equal to it up to
+# the angular step, computed with a single matrix product instead of a sequential hull walk
+def convex_outline(points, directions=OUTLINE_DIRECTIONS):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) == 0:
+        return points
+    angles = np.linspace(0, 2 * np.pi, directions, endpoint=False)
+    support = np.argmax(points @ np.stack([np.cos(angles), np.sin(angles)]), axis=0)
+    # Pontos de apoio repetidos em direções vizinhas viram um único vértice
+    keep = support != np.roll(support, 1)
+    if not keep.any():
+        return points[support[:1]]
+    return points[support[keep]]
+
+# Use this function to rasterize convex polygons (lists of (k, 2) points, in pixels) on the grid of pixels
+# [x0, x0 + width) x [y0, y0 + height): a pixel is inside when its center is, one scanline interval per polygon
+def fill_convex_polygons(polygons, x0, y0, width, height):
+    centers_y = y0 + np.arange(height) + 0.5
+    centers_x = x0 + np.arange(width) + 0.5
+    mask = np.zeros((height, width), dtype=bool)
+    for polygon in polygons:
+        if len(polygon) < 3:
+            continue
+        start, end = polygon, np.roll(polygon, -1, axis=0)
+        low, high = np.minimum(start[:, 1], end[:, 1]), np.maximum(start[:, 1], end[:, 1])
+        # Interseção de cada linha com cada aresta que a cruza (linhas x arestas)
+        crosses = (low <= centers_y[:, None]) & (centers_y[:, None] < high)
+        dy = np.where(high > low, end[:, 1] - start[:, 1], 1.0)
+        x = start[:, 0] + (centers_y[:, None] - start[:, 1]) / dy * (end[:, 0] - start[:, 0])
+        left = np.where(crosses, x, np.inf).min(axis=1)
+        right = np.where(crosses, x, -np.inf).max(axis=1)
+        mask |= (centers_x >= left[:, None]) & (centers_x < right[:, None])
+    return mask
+
+# Use this function to measure how much of each instance is visible. instances is a list of (class_id, object_ids),
+# where object_ids are pass indices; projected_points[i] holds the projected mesh points (m, 2) of the object with
+# index i + 1, normalized with the origin at the top, so they are scaled to the index map whatever the render
+# resolution percentage. The visible fraction of an instance is its pixel count on the index map over the area of
+# the union of the convex outlines of its objects, rasterized on the same grid and not clipped to the image, so
+# truncation at the image edge and occlusion anywhere on the object are counted (for concave objects the outline is
+# larger than the silhouette, so the fraction of an unoccluded instance stays a little below 1). The box-extent ratio
+# (visible box over projected box area) is returned as well, for the log.
+# Returns one (visible box or None, visible fraction, box-extent ratio, pixel count) per instance
+def instance_visibility(index_map, instances, projected_points):
+    height, width = index_map.shape
+    pixel_counts, boxes = visible_extents(index_map, len(projected_points))
+    outlines = [convex_outline(points) * (width, height) for points in projected_points]
+    results = []
+    for class_id, object_ids in instances:
+        members = [object_id - 1 for object_id in object_ids if pixel_counts[object_id - 1] > 0]
+        polygons = [outlines[object_id - 1] for object_id in object_ids if len(outlines[object_id - 1])]
+        if not members or not polygons:
+            results.append((None, 0.0, 0.0, int(pixel_counts[members].sum())))
+            continue
+        visible = union_box(boxes[members])
+        pixel_count = int(pixel_counts[members].sum())
+
+        points = np.concatenate(polygons)
+        projected = (*points.min(axis=0), *points.max(axis=0))
+        ratio = min(1.0, box_area(visible) / box_area(projected)) if box_area(projected) > 0 else 0.0
+
+        # A grade cobre o contorno fora da imagem também, limitada a uma imagem de margem em cada lado
+        x0 = int(max(np.floor(projected[0]), -width))
+        y0 = int(max(np.floor(projected[1]), -height))
+        x1 = int(min(np.ceil(projected[2]), 2 * width))
+        y1 = int(min(np.ceil(projected[3]), 2 * height))
+        outline_area = int(fill_convex_polygons(polygons, x0, y0, max(0, x1 - x0), max(0, y1 - y0)).sum())
+        fraction = min(1.0, pixel_count / outline_area) if outline_area > 0 else 0.0
+        results.append((visible, float(fraction), float(ratio), pixel_count))
+    return results
+
+# Use this function to get the YOLO line of a pixel box (origin at the top) of the rendered image
+def yolo_line(class_id, box, render_width, render_height, letterbox=None):
+    (x_min, y_min), (x_max, y_max) = normalize_points([box[:2], box[2:]], render_width, render_height, letterbox)
+    return f"{class_id} {(x_min + x_max) / 2:.6f} {(y_min + y_max) / 2:.6f} {x_max - x_min:.6f} {y_max - y_min:.6f}\n"
+
+# Use this function to build the outputs of a frame from its index map: instances is a list of
+# (class_id, object_ids); returns the detection label from the mask boxes, the YOLO-seg label and the mask image
+# (pixel value = position of the instance in the list, starting at 1)
+def mask_outputs(index_map, instances, letterbox=None, max_points=100):
+    render_height, render_width = index_map.shape
+    lookup = np.zeros(256, dtype=np.uint8)
+    detection_lines, segment_lines = [], []
+    for instance_number, (class_id, object_ids) in enumerate(instances, start=1):
+        lookup[list(object_ids)] = instance_number
+        mask = np.isin(index_map, object_ids)
+        box = mask_box(mask)
+        if box is None:
+            continue
+        detection_lines.append(yolo_line(class_id, box, render_width, render_height, letterbox))
+        polygon = normalize_points(mask_polygon(mask, max_points), render_width, render_height, letterbox)
+        segment_lines.append(f"{class_id} " + " ".join(f"{value:.6f}" for value in polygon.ravel()) + "\n")
+
+    mask_image = lookup[index_map]
+    if letterbox is not None and letterbox.pads:
+        padded = np.zeros((letterbox.height, letterbox.width), dtype=np.uint8)
+        padded[letterbox.top:letterbox.top + render_height, letterbox.left:letterbox.left + render_width] = mask_image
+        mask_image = padded
+    return "".join(detection_lines), "".join(segment_lines), mask_image
+
+# Registro por frame da visibilidade de cada instância (visibility_<shard>.jsonl), escrito pelas threads do writer
+class VisibilityLog:
+    def __init__(self, directory, shard_index=0):
+        self.path = os.path.join(directory, f"visibility_{shard_index}.jsonl")
+        self.lock = threading.Lock()
+
+    def write(self, frame_index, records):
+        line = json.dumps({"frame": frame_index, "instances": records}) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+# Use this function as the writer job when masks are enabled: the label comes from the mask boxes,
+# and the YOLO-seg label and the instance mask are written next to the image
+def write_frame_with_masks(image_path, pixels, settings, annotation_path, segment_path, mask_path, instances, max_points=100):
+    color, index_map = split_index(pixels)
+    annotation_line, segment_line, mask_image = mask_outputs(index_map, instances, settings.get("letterbox"), max_points)
+    write_frame(image_path, color, settings, annotation_path, annotation_line)
+    write_atomic(segment_path, segment_line)
+    write_atomic(mask_path, encode_png(mask_image, settings["level"]))
+
+# Use this function as the writer job of the visible-box mode: each label is the visible box of its instance;
+# instances whose visible fraction is below min_visibility are dropped, or kept and only marked in the log when flag_only is True.
+# With segment_path and mask_path, the masks of the kept instances are written as in write_frame_with_masks
+def write_frame_with_visible_boxes(image_path, pixels, settings, annotation_path, instances, projected_points, min_visibility=0.0, flag_only=False, visibility_log=None, frame_index=None, segment_path=None, mask_path=None, max_points=100):
+    color, index_map = split_index(pixels)
+    render_height, render_width = index_map.shape
+    letterbox = settings.get("letterbox")
+    lines, records, kept_instances = [], [], []
+    for instance, (box, fraction, ratio, pixel_count) in zip(instances, instance_visibility(index_map, instances, projected_points)):
+        low = fraction < min_visibility
+        kept = box is not None and (flag_only or not low)
+        if kept:
+            lines.append(yolo_line(instance[0], box, render_width, render_height, letterbox))
+            kept_instances.append(instance)
+        records.append({"class_id": instance[0], "visible_fraction": round(fraction, 4), "box_extent_ratio": round(ratio, 4), "pixels": pixel_count, "low_visibility": low, "kept": kept})
+
+    write_frame(image_path, color, settings, annotation_path, "".join(lines))
+    if segment_path is not None:
+        _, segment_line, mask_image = mask_outputs(index_map, kept_instances, letterbox, max_points)
+        write_atomic(segment_path, segment_line)
+        write_atomic(mask_path, encode_png(mask_image, settings["level"]))
+    if visibility_log is not None:
+        visibility_log.write(frame_index, records)
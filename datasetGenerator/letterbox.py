@@ -0,0 +1,59 @@
+import numpy as np
+
+# Renderiza direto no tamanho de treino. Com pad=False (padrão) a resolução passa a ser size e a câmera mostra
+# o campo de visão desse formato; com pad=True a imagem é escalada para caber em size e centralizada com bordas
+# de cor color, com a mesma geometria de letterbox() em scripts/anotate.py. As bordas são adicionadas aos pixels
+# do render (imageWriter.write_frame), o que exige PNG, a transformação Standard ou Raw e um render por frame.
+class Letterbox:
+    # color está em BGR, como no cv2 de scripts/anotate.py
+    def __init__(self, size=(640, 640), color=(174, 173, 28), pad=False):
+        self.width, self.height = size
+        self.color = tuple(color)
+        self.pad = pad
+        self.render_width, self.render_height = self.width, self.height
+        self.left, self.top = 0, 0
+
+    # Use this function to compute the rendered area and the borders for a source resolution
+    def fit(self, source_width, source_height):
+        if not self.pad:
+            self.render_width, self.render_height = self.width, self.height
+            self.left, self.top = 0, 0
+            return
+        ratio = min(self.height / source_height, self.width / source_width)
+        self.render_width = int(round(source_width * ratio))
+        self.render_height = int(round(source_height * ratio))
+        self.left = (self.width - self.render_width) // 2
+        self.top = (self.height - self.render_height) // 2
+
+    # Use this function after the render profile; the scene renders only the pixels kept in the final image
+    def configure_scene(self, scene):
+        percentage = scene.render.resolution_percentage / 100
+        self.fit(scene.render.resolution_x * percentage, scene.render.resolution_y * percentage)
+        scene.render.resolution_x = self.render_width
+        scene.render.resolution_y = self.render_height
+        scene.render.resolution_percentage = 100
+
+    # True when the rendered image needs borders to reach the training size
+    @property
+    def pads(self):
+        return (self.render_width, self.render_height) != (self.width, self.height)
+
+    # Use this function to turn a point of the rendered image (pixels, origin at the top) into the training image
+    def to_training_frame(self, x, y):
+        return x + self.left, y + self.top
+
+    # Use this function to add the borders to a rendered (height, width[, channels]) uint8 or uint16 image in RGB order
+    def pad_image(self, image):
+        if not self.pads:
+            return image
+        scale = 257 if image.dtype == np.uint16 else 1
+        color = [channel * scale for channel in self.color[::-1]]
+        if image.ndim == 2:
+            color = round(0.2126 * color[0] + 0.7152 * color[1] + 0.0722 * color[2])
+        elif image.shape[2] == 4:
+            color = color + [255 * scale]
+
+        padded = np.empty((self.height, self.width) + image.shape[2:], dtype=image.dtype)
+        padded[...] = color
+        padded[self.top:self.top + self.render_height, self.left:self.left + self.render_width] = image
+        return padded
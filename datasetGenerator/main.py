@@ -4,12 +4,36 @@ from mathutils import Vector
 import math
 import random
 import os
+import sys
+import time
+import numpy as np
 random.seed(42)
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from shardManager import ShardManager
+from variationPlan import load_scenario
+from renderManifest import RenderManifest, run_params
+from bboxProjector import BoundingBoxProjector, is_box_accepted
+from runConfig import parse_run_args, resolve_output_dir, resolve_output_format, resolve_letterbox, resolve_composer
+from renderProfiles import apply_render_profile
+from outputFormats import apply_output_format
+from stageTimer import StageTimer
+from telemetry import Telemetry
+from imageWriter import AsyncImageWriter, prepare_viewer, read_render_pixels, encode_settings, save_blender_color, write_frame
+from sceneComposer import footprint
+from poseState import PoseState
+from instanceMasks import prepare_index_pass, assign_pass_indices, write_frame_with_masks, write_frame_with_visible_boxes, VisibilityLog
+
 class AnnotationManager:
-    def __init__(self, objects, class_id=0):
+    def __init__(self, objects, class_id=0, vectorized=True, tight=False, letterbox=None):
         self.objects = objects
         self.class_id = class_id
+        # Com um Letterbox as anotações são normalizadas pela imagem de treino, bordas incluídas
+        self.letterbox = letterbox
+        # Projeta todos os cantos com NumPy em vez de chamar world_to_camera_view por canto
+        self.vectorized = vectorized
+        # tight=True projeta os vértices da malha em vez dos 8 cantos de bound_box (requer vectorized)
+        self.projector = BoundingBoxProjector(bpy.context.scene, mode="vertices" if tight else "bound_box")
         self.bbox = self.get_bounding_box(objects)
         self.formatted_bbox = self.format_bounding_box(self.bbox)
     
@@ -24,6 +48,9 @@ class AnnotationManager:
         # Retorna a bounding box contendo todos os objetos
         if not objects:
             return None
+
+        if self.vectorized or self.projector.mode == "vertices":
+            return self.projector.get_bounding_box(objects)
         
         # Projeta cada canto da bounding box do objeto para a vista da câmera
         bbox_corners = [
@@ -67,18 +94,41 @@ class AnnotationManager:
         if x_center < 0 or x_center > 1 or y_center < 0 or y_center > 1:
             print(f"Objeto fora dos limites, anotação não gerada.")
             return
+
+        if self.letterbox is not None:
+            x_center, y_center = self.letterbox.to_training_frame(x_center * scene.render.resolution_x, y_center * scene.render.resolution_y)
+            x_center /= self.letterbox.width
+            y_center /= self.letterbox.height
+            width *= scene.render.resolution_x / self.letterbox.width
+            height *= scene.render.resolution_y / self.letterbox.height
         return (x_center, y_center, width, height, class_id)
     
-    # Use this function to save the current anotation    
-    def write_annotation(self, annotation_file, formatted_bbox=None):
+    # Use this function to get the text of the current annotation, or None if there is none
+    def annotation_line(self, formatted_bbox=None):
         if formatted_bbox is None:
             formatted_bbox = self.formatted_bbox
         if formatted_bbox is None:
-            return
-        
+            return None
+
         x_center, y_center, width, height, class_id = formatted_bbox
-        
-        annotation_line = f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
+        return f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
+
+    # Use this function to get the projected mesh points (m, 2) of each object, normalized with the origin at the top
+    # and unclipped (the reference outline of the visible fraction, see instanceMasks.instance_visibility)
+    def projected_points(self):
+        self.projector.update_camera()
+        outlines = []
+        for points in self.projector.projected_points(self.objects):
+            # Pontos atrás da câmera não têm projeção útil
+            points = points[points[:, 2] > 0]
+            outlines.append(np.column_stack([points[:, 0], 1.0 - points[:, 1]]))
+        return outlines
+
+    # Use this function to save the current anotation    
+    def write_annotation(self, annotation_file, formatted_bbox=None):
+        annotation_line = self.annotation_line(formatted_bbox)
+        if annotation_line is None:
+            return
         with open(annotation_file, "w") as f:
             f.write(annotation_line)
     
@@ -151,6 +201,10 @@ class sceneManager:
         light.data.energy = energy
         light.name = "Light"
     
+    # Use this function to set engine, samples, denoiser, bounces and resolution from a named profile
+    def apply_render_profile(self, profile):
+        return apply_render_profile(bpy.context.scene, profile)
+
     def hide_other_objects(self, objects):
         selected_objects = objects
         for obj in bpy.context.scene.objects:
@@ -168,82 +222,38 @@ class sceneManager:
 class ObjectManager:
     def __init__(self, objects):
         self.objects = objects
-        self.flipped = False
-    
-    def open_and_close(self, angle_degrees, objects=None):
-        if objects is None:
-            objects = self.objects
-        if not objects or len(objects) != 2:
-            return
-        
-        obj1, obj2 = objects
+        # As variações mudam a pose em NumPy; apply_pose grava no Blender uma vez por frame (ver poseState.py)
+        self.pose = PoseState(len(objects))
+
+    @property
+    def flipped(self):
+        return self.pose.flipped
+
+    def open_and_close(self, angle_degrees):
+        self.pose.hinge(angle_degrees)
 
-        angle_rad = math.radians(angle_degrees)
-        
-        obj1.rotation_euler.z = obj2.rotation_euler.z - angle_rad
-    
     def flip_objects(self):
-        if not self.flipped:
-            for obj in self.objects:
-                obj.scale.z *= -1
-            self.flipped = True
-        else:
-            for obj in self.objects:
-                obj.scale.z *= -1
-            self.flipped = False
-    
+        self.pose.flip()
+
     def rotate_objects(self, angle_degrees, axis='x'):
-        angle_rad = math.radians(angle_degrees)
-        for obj in self.objects:
-            if axis == 'x':
-                obj.rotation_euler.x += angle_rad
-            elif axis == 'y':
-                obj.rotation_euler.y += angle_rad
-            elif axis == 'z':
-                obj.rotation_euler.z += angle_rad
-            else:
-                raise ValueError("Axis must be 'x', 'y', or 'z'.")
-    
+        self.pose.rotate(angle_degrees, axis)
+
     def move_objects(self, location):
-        for obj in self.objects:
-            obj.location = location
-    
-    def randomly_move(self, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3), objects=None):
-        if objects is None:
-            objects = self.objects
+        self.pose.location[:] = location
+
+    # Move o grupo junto, a partir da posição atual do primeiro objeto
+    def randomly_move(self, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3), rng=None):
+        self.pose.random_move(x_range, y_range, rng)
 
-        # Pega as coordenadas globais iniciais de todos os objetos
-        initial_positions = {obj: obj.location.copy() for obj in objects}
-
-        # Verifica se a lista de objetos tem mais de um item
-        if len(objects) != 2:
-            # Mova o único objeto individualmente
-            x = random.uniform(*x_range) + initial_positions[objects[0]].x
-            y = random.uniform(*y_range) + initial_positions[objects[0]].y
-            obj = objects[0]
-            obj.location.x = x
-            obj.location.y = y
-            return
-        
-        # Se for composto por 2 objetos, move ambos juntos
-        obj1, obj2 = objects
-        x = random.uniform(*x_range) + initial_positions[obj1].x
-        y = random.uniform(*y_range) + initial_positions[obj1].y
-
-        # Move os dois objetos para a nova posição aleatória baseada nas posições iniciais
-        obj1.location.x = x
-        obj1.location.y = y
-        obj2.location.x = x
-        obj2.location.y = y
-            
     def reset_objects(self):
+        self.pose.reset()
         for obj in self.objects:
-            obj.rotation_euler = (0, 0, 0)
-            obj.location = (0, 0, 0)
-            obj.scale = (1, 1, 1)
             obj.hide_set(False)
-        self.flipped = False
-    
+
+    # Use this function once per frame, after the variations, to write the pose of all objects to Blender
+    def apply_pose(self):
+        self.pose.apply(self.objects)
+
     def ocult_objects(self, objects=None):
         if objects is None:
             objects = self.objects
@@ -253,160 +263,395 @@ class ObjectManager:
     def return_objects(self):
         return self.objects
 
-def generate_scenario(output_dir):
-    object_count = 0
-
-    object_class = 0
-
-    # Process type 1: Open and close objects
-    for objects in instruments1:
-        object_manager = ObjectManager(objects)
-        annotation_manager = AnnotationManager(objects, class_id=object_class)
-
-        # Reset the objects to their initial state
-        object_manager.reset_objects()
-
-        # Hide other objects in the scene
-        scene_manager.hide_other_objects(objects)
-
-        # Generate variations
-        angles = [ 30, 45, 60, 75 ]
-
-        rotation_angles = [0, 30, 60, 90]
-
-        for angle in angles:
-            # Open and close the objects
-            object_manager.open_and_close(angle)
-
-            for rotation_angle in rotation_angles:
-                # Flip the objects
-                object_manager.flip_objects()
-
-                # Randomly move the objects to a new position
-                object_manager.randomly_move(x_range=(-0.1, 0.1), y_range=(-0.1, 0.1), objects=objects)
-                # Rotate the objects in z axis
-                object_manager.rotate_objects(rotation_angle, axis='z')
-                
-                # Save the rendered image
-                bpy.context.scene.render.filepath = f"{output_dir}/{object_count}.png"
-                bpy.ops.render.render(write_still=True)
+# With a writer, the pixels are copied from the Render Result and the image and annotation are
+# written by the writer's threads while the next frame renders; the files exist once writer.completed() returns frame_index.
+# A letterbox that pads also takes the pixels from the Render Result, to add the borders before encoding.
+# With masks, the same pixels carry the object index: the annotation comes from the mask box and the
+# YOLO-seg label (<frame>_seg.txt) and the instance mask (<frame>_mask.png) are written too (see instanceMasks.py).
+# With visibility = (min_visibility, flag_only, visibility_log), the annotation is the visible box measured on the
+# object index, and instances hidden or cut below min_visibility are dropped or flagged
+def render_frame(output_dir, frame_index, annotation_manager, timer, writer=None, letterbox=None, masks=False, visibility=None):
+    # Um frame composto (compose_frame) tem um AnnotationManager por instrumento, um por linha da anotação
+    annotation_managers = annotation_manager if isinstance(annotation_manager, list) else [annotation_manager]
+    lines = [line for line in (manager.annotation_line() for manager in annotation_managers) if line is not None]
+    annotation_line = "".join(lines) if lines else None
+
+    # Render, then save the Render Result, so both stages can be timed apart
+    image_path = f"{output_dir}/{frame_index}{bpy.context.scene.render.file_extension}"
+    annotation_path = f"{output_dir}/{frame_index}.txt"
+    bpy.context.scene.render.filepath = image_path
+    with timer.stage("render"):
+        bpy.ops.render.render()
+
+    if writer is not None or masks or visibility is not None or (letterbox is not None and letterbox.pads):
+        scene = bpy.context.scene
+        settings = encode_settings(scene, letterbox, frame_index)
+        # Formatos e transformações de cor que o writer não reproduz são gravados pelo Blender; os pixels
+        # ainda são lidos quando o índice dos objetos é necessário
+        if settings["blender_color"]:
+            with timer.stage("image_write"):
+                save_blender_color(image_path, settings)
+        pixels = None
+        if masks or visibility is not None or not settings["blender_color"]:
+            with timer.stage("pixel_read"):
+                pixels = read_render_pixels(scene)
+        # Com máscaras ou caixas visíveis a anotação é sempre gravada, mesmo vazia
+        outputs = [image_path, annotation_path] if masks or visibility is not None or annotation_line is not None else [image_path]
+        # Os objetos de cada grupo formam uma instância; cada objeto tem o seu índice (1, 2, ...), na ordem dos grupos
+        instances, first_index = [], 1
+        for manager in annotation_managers:
+            instances.append((manager.class_id, list(range(first_index, first_index + len(manager.objects)))))
+            first_index += len(manager.objects)
+        segment_path, mask_path = None, None
+        if masks:
+            segment_path = f"{output_dir}/{frame_index}_seg.txt"
+            mask_path = f"{output_dir}/{frame_index}_mask.png"
+            outputs += [segment_path, mask_path]
+
+        if visibility is not None:
+            min_visibility, flag_only, visibility_log = visibility
+            projected_points = [points for manager in annotation_managers for points in manager.projected_points()]
+            job = [write_frame_with_visible_boxes, image_path, pixels, settings, annotation_path, instances, projected_points,
+                   min_visibility, flag_only, visibility_log, frame_index, segment_path, mask_path]
+        elif masks:
+            job = [write_frame_with_masks, image_path, pixels, settings, annotation_path, segment_path, mask_path, instances]
+        else:
+            job = [write_frame, image_path, pixels, settings, annotation_path, annotation_line]
 
-                # Update the bounding box and write the annotation
-                annotation_manager.update_bounding_box()
-                annotation_manager.write_annotation(f"{output_dir}/{object_count}.txt")
-                
-                object_count += 1
-        
-        object_class += 1
-
-    # Process type 2: Objects of four sides of interest
-    for objects in instruments2:
-        object_manager = ObjectManager(objects)
-        annotation_manager = AnnotationManager(objects, class_id=object_class)
-
-        # Reset the objects to their initial state
-        object_manager.reset_objects()
-
-        # Hide other objects in the scene
-        scene_manager.hide_other_objects(objects)
-
-        # Generate variations
-        angles = [0, 90, 180, 270]
-
-        rotation_angles = [0, 30, 60, 90]
-
-        for angle in angles:
-            # Rotate the objects in x axis
-            object_manager.rotate_objects(angle)
-
-            for rotation_angle in rotation_angles:
-
-                # Randomly move the objects to a new position
-                object_manager.randomly_move(x_range=(-0.1, 0.1), y_range=(-0.1, 0.1), objects=objects)
-                # Rotate the objects in z axis
-                object_manager.rotate_objects(rotation_angle, axis='z')
-                
-                # Save the rendered image
-                bpy.context.scene.render.filepath = f"{output_dir}/{object_count}.png"
-                bpy.ops.render.render(write_still=True)
-
-                # Update the bounding box and write the annotation
-                annotation_manager.update_bounding_box()
-                annotation_manager.write_annotation(f"{output_dir}/{object_count}.txt")
-                
-                object_count += 1
-        object_class += 1
-
-    # Process type 3: Objects of two sides of interest
-    for objects in instruments3:
-        object_manager = ObjectManager(objects)
-        annotation_manager = AnnotationManager(objects, class_id=object_class)
-
-        # Reset the objects to their initial state
-        object_manager.reset_objects()
-
-        # Hide other objects in the scene
-        scene_manager.hide_other_objects(objects)
-
-        # Generate variations
-        angles = [0, 180]
-
-        rotation_angles = [0, 15, 30, 45, 60, 75, 90, 105]
-
-        for angle in angles:
-            # Rotate the objects in x axis
-            object_manager.rotate_objects(angle)
-
-            for rotation_angle in rotation_angles:
-                # Randomly move the objects to a new position
-                object_manager.randomly_move(x_range=(-0.1, 0.1), y_range=(-0.1, 0.1), objects=objects)
-                # Rotate the objects in z axis
-                object_manager.rotate_objects(rotation_angle, axis='z')
-                
-                # Save the rendered image
-                bpy.context.scene.render.filepath = f"{output_dir}/{object_count}.png"
-                bpy.ops.render.render(write_still=True)
-
-                # Update the bounding box and write the annotation
-                annotation_manager.update_bounding_box()
-                annotation_manager.write_annotation(f"{output_dir}/{object_count}.txt")
-                
-                object_count += 1
-        object_class += 1
-
-# Initialize the SceneManager with the camera, circle, plane, lights, and materials
-camera = bpy.data.objects.get("Camera")
-plane = bpy.data.objects.get("Plane")
-light_obj = bpy.data.objects.get("Light")
-lights = [light_obj] if light_obj else []
-scene_manager = sceneManager(camera, plane, lights, plane_materials=["Fabric-03"])
-
-# Initialize list of objects of eacht type
-instruments1 = [[bpy.data.objects["Mosquito.001"], bpy.data.objects["Mosquito.002"]], [bpy.data.objects["Allis.044"], bpy.data.objects["Allis.033"]], [bpy.data.objects["Tesoura.052"], bpy.data.objects["Tesoura.051"]]]
-#instruments1 = [[bpy.data.objects["Cube.052"], bpy.data.objects["Cube.051"]]]
-instruments2 = [[bpy.data.objects["Pinca.002"]]]
-instruments3 = [[bpy.data.objects["Bisturi.003"]]]
-
-### 
-
-# Scenarios
-camera_configs = {
-    "location": (0, 0, 2),
-    "distortion": (0.1159, 2.8841, -0.0074, 0.0471, -11.8008),
-    "focal_length": 35.0
-}
-
-light_configs = {
-    "location": (0, 0, 2),
-    "color": (1, 1, 1),
-    "rotation": (0, 0, 0),
-    "energy": 100
-}
-
-scene_manager.setup_scene(camera_configs, light_configs)
-output_dir = f"/home/jedl/Documents/synthetic-3d-model/datasets/dataset_1"
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-# Generate scenario
-generate_scenario(output_dir)
\ No newline at end of file
+        if writer is not None:
+            # Blocks here when the writer queue is full
+            with timer.stage("image_submit"):
+                writer.submit(frame_index, *job)
+        else:
+            with timer.stage("image_write"):
+                job[0](*job[1:])
+        return outputs
+
+    with timer.stage("image_write"):
+        bpy.data.images["Render Result"].save_render(filepath=image_path)
+
+    # Write the annotation computed before rendering (see place_objects)
+    with timer.stage("annotation_write"):
+        if annotation_line is not None:
+            with open(annotation_path, "w") as f:
+                f.write(annotation_line)
+    return [image_path, annotation_path] if annotation_line is not None else [image_path]
+
+# Use this function once before the loop: the camera, light and plane values of the scene, used for the axes
+# that a plan does not vary (see apply_scene_variations)
+def capture_scene_defaults():
+    defaults = {"lens": scene_manager.camera.data.lens, "material": scene_manager.plane.data.materials[0].name}
+    if scene_manager.lights:
+        defaults["light_position"] = tuple(scene_manager.lights[0].location)
+        defaults["light_color"] = tuple(scene_manager.lights[0].data.color)
+    return defaults
+
+# Use this function to apply the camera, light and plane axes of a frame. An axis missing from the frame takes the
+# value of the plan settings (scenario "defaults" included) or of the scene before the run, never the value left by
+# the previous frame, so a frame looks the same whichever shard renders it and after a resume
+def apply_scene_variations(plan, frame, defaults):
+    scene_manager.camera.data.lens = frame.get("lens", plan.settings.get("lens", defaults["lens"]))
+    if scene_manager.lights:
+        light = scene_manager.lights[0]
+        light.location = frame.get("light_position", plan.settings.get("light_position", defaults["light_position"]))
+        if "temperature" in frame:
+            light.data.color = plan.tables["temperature"][frame["temperature"]]
+        else:
+            light.data.color = defaults["light_color"]
+    material = frame.get("material", plan.settings.get("material", defaults["material"]))
+    if scene_manager.plane.data.materials[0].name != material:
+        scene_manager.plane.data.materials[0] = bpy.data.materials[material]
+
+# Use this function to set the shape of a group (opening, x rotation, flip) from the reset state, without moving it
+def apply_group_pose(frame, object_manager):
+    # Reset the objects to their initial state
+    object_manager.reset_objects()
+
+    # Open and close the objects
+    if "open_angle" in frame:
+        object_manager.open_and_close(frame["open_angle"])
+    # Rotate the objects in x axis
+    if "x_angle" in frame:
+        object_manager.rotate_objects(frame["x_angle"])
+    # Flip the objects
+    if frame.get("flip"):
+        object_manager.flip_objects()
+
+# Use this function to set the objects pose of a frame starting from the reset state
+def apply_object_variations(plan, frame, object_manager, rng):
+    apply_group_pose(frame, object_manager)
+
+    # Randomly move the objects to a new position
+    move_range = tuple(plan.settings.get("move_range", (-0.1, 0.1)))
+    object_manager.randomly_move(x_range=move_range, y_range=move_range, rng=rng)
+    # Rotate the objects in z axis
+    if "rotation" in frame:
+        object_manager.rotate_objects(frame["rotation"], axis='z')
+    object_manager.apply_pose()
+
+# Use this function to pose the objects and compute the annotation before rendering.
+# Poses whose box center falls outside the image or whose visible fraction is below
+# min_visibility are resampled with the frame's generator; returns the number of rejected poses,
+# or None if no pose was accepted after max_attempts
+def place_objects(plan, frame, object_manager, annotation_manager, rng, timer):
+    scene = bpy.context.scene
+    min_visibility = plan.settings.get("min_visibility", 0.0)
+    max_attempts = plan.settings.get("max_attempts", 10)
+
+    for attempt in range(max_attempts):
+        with timer.stage("pose"):
+            apply_object_variations(plan, frame, object_manager, rng)
+        with timer.stage("depsgraph_update"):
+            bpy.context.view_layer.update()
+
+        with timer.stage("bbox_projection"):
+            bbox = annotation_manager.get_bounding_box()
+        if is_box_accepted(bbox, scene.render.resolution_x, scene.render.resolution_y, min_visibility):
+            annotation_manager.bbox = bbox
+            annotation_manager.formatted_bbox = annotation_manager.format_bounding_box(bbox)
+            return attempt
+    return None
+
+# Groups used by the composer, by plan name: (objects, ObjectManager, AnnotationManager), created on first use
+def composer_group(plan, groups, letterbox=None):
+    if plan.name not in groups:
+        objects = [bpy.data.objects[name] for name in plan.settings["objects"]]
+        groups[plan.name] = (objects, ObjectManager(objects), AnnotationManager(
+            objects,
+            class_id=plan.settings.get("class_id", 0),
+            tight=plan.settings.get("tight_boxes", False),
+            letterbox=letterbox
+        ))
+    return groups[plan.name]
+
+# Use this function to render the frame of a plan together with other instruments of the scenario: the other groups
+# and their variations are drawn with the frame's generator, and all groups are placed on the table without
+# overlapping footprints (see sceneComposer.py). Returns the annotation managers of the groups in view
+def compose_frame(scenario, plan, frame, composer, groups, rng, timer, letterbox=None):
+    others = [other for other in scenario.plans if other is not plan]
+    chosen = [(plan, frame)] + [(other, other[rng.randrange(len(other))]) for other in rng.sample(others, min(composer.count - 1, len(others)))]
+    members = [(group_plan, group_frame) + composer_group(group_plan, groups, letterbox) for group_plan, group_frame in chosen]
+    scene_manager.hide_other_objects([obj for _, _, objects, _, _ in members for obj in objects])
+
+    with timer.stage("pose"):
+        for _, group_frame, _, object_manager, _ in members:
+            apply_group_pose(group_frame, object_manager)
+            object_manager.apply_pose()
+    with timer.stage("depsgraph_update"):
+        bpy.context.view_layer.update()
+
+    # Pegadas medidas na pose de repouso (origem, sem rotação em z); a rotação do plano é mantida quando existe
+    with timer.stage("placement"):
+        footprints = [footprint(annotation_manager.projector.world_corners(objects)) for _, _, objects, _, annotation_manager in members]
+        angles = [math.radians(group_frame["rotation"]) if "rotation" in group_frame else None for _, group_frame, _, _, _ in members]
+        placements = composer.place(footprints, np.random.default_rng(rng.getrandbits(64)), angles)
+
+    # Gravar as posições sorteadas faz parte de placement, para que pose seja medida uma vez por frame
+    with timer.stage("placement"):
+        for (_, _, objects, object_manager, _), placement in zip(members, placements):
+            if placement is None:
+                for obj in objects:
+                    obj.hide_set(True)
+                    obj.hide_render = True
+                continue
+            x, y, angle = placement
+            object_manager.pose.rotate(math.degrees(angle), axis='z')
+            object_manager.pose.move_by(x, y)
+            object_manager.apply_pose()
+    with timer.stage("depsgraph_update"):
+        bpy.context.view_layer.update()
+
+    # Grupos fora da imagem ou cortados abaixo de min_visibility são ocultados em vez de ficarem sem anotação
+    scene = bpy.context.scene
+    annotation_managers = []
+    with timer.stage("bbox_projection"):
+        for (group_plan, _, objects, _, annotation_manager), placement in zip(members, placements):
+            if placement is None:
+                continue
+            bbox = annotation_manager.get_bounding_box()
+            if not is_box_accepted(bbox, scene.render.resolution_x, scene.render.resolution_y, group_plan.settings.get("min_visibility", 0.0)):
+                for obj in objects:
+                    obj.hide_set(True)
+                    obj.hide_render = True
+                continue
+            annotation_manager.bbox = bbox
+            annotation_manager.formatted_bbox = annotation_manager.format_bounding_box(bbox)
+            annotation_managers.append(annotation_manager)
+    return annotation_managers
+
+# Each frame sets its pose from the reset state and uses its own random generator,
+# so any shard can render any frame and the merged output matches a single-process run.
+# With a SceneComposer, each frame of a plan also shows other instruments of the scenario (see compose_frame)
+def generate_scenario(scenario, output_dir, shard_manager=None, timer=None, telemetry=None, writer=None, letterbox=None, masks=False, composer=None):
+    if shard_manager is None:
+        shard_manager = ShardManager()
+    # Per-stage timing is only collected when a StageTimer is given (see scripts/benchmark_stages.py)
+    if timer is None:
+        timer = StageTimer(enabled=False)
+    # Progress and ETA are always printed; metrics files are only written when telemetry has a directory
+    if telemetry is None:
+        telemetry = Telemetry(len(shard_manager.frame_indices(len(scenario))), shard_index=shard_manager.shard_index)
+
+    # Frames already completed by a previous run with the same settings are skipped
+    manifest = RenderManifest(output_dir, shard_manager.shard_index)
+    settings_params = run_params(bpy.context.scene, scenario.seed, letterbox)
+    settings_params["masks"] = masks
+
+    # Frames handed to the writer are only recorded in the manifest after their files are written
+    # Plans with "visible_boxes" label the visible part of the objects, measured on the object index pass
+    visible_boxes = any(plan.settings.get("visible_boxes", False) for plan in scenario.plans)
+    for plan in scenario.plans:
+        # A fração visível compara com o contorno projetado; com os 8 cantos de bound_box ele fica folgado e a fração baixa
+        if plan.settings.get("visible_boxes", False) and not plan.settings.get("tight_boxes", False):
+            raise ValueError(f"O plano '{plan.name}' usa visible_boxes sem tight_boxes; ative tight_boxes para medir a visibilidade.")
+    if writer is not None or masks or visible_boxes or (letterbox is not None and letterbox.pads):
+        prepare_viewer(bpy.context.scene)
+    if masks or visible_boxes:
+        prepare_index_pass(bpy.context.scene)
+    visibility_log = VisibilityLog(output_dir, shard_manager.shard_index) if visible_boxes else None
+    scene_defaults = capture_scene_defaults()
+    written = {}
+    groups = {}
+
+    current_plan = None
+    for object_count in shard_manager.frame_indices(len(scenario)):
+        plan, local_index, frame = scenario[object_count]
+
+        # Prepare the managers when the frame belongs to a new group of objects
+        if plan is not current_plan:
+            if composer is None:
+                objects = [bpy.data.objects[name] for name in plan.settings["objects"]]
+                object_manager = ObjectManager(objects)
+                annotation_manager = AnnotationManager(
+                    objects,
+                    class_id=plan.settings.get("class_id", 0),
+                    tight=plan.settings.get("tight_boxes", False),
+                    letterbox=letterbox
+                )
+
+                # Hide other objects in the scene
+                scene_manager.hide_other_objects(objects)
+                if masks or visible_boxes:
+                    assign_pass_indices([(i + 1, [obj]) for i, obj in enumerate(objects)])
+            visibility = None
+            if plan.settings.get("visible_boxes", False):
+                # low_visibility: "drop" remove a anotação, "flag" mantém e só marca no visibility_<shard>.jsonl
+                visibility = (plan.settings.get("min_visible_fraction", 0.0), plan.settings.get("low_visibility", "drop") == "flag", visibility_log)
+            current_plan = plan
+
+            plan_start = object_count - local_index
+            telemetry.start_dataset(plan.name, len(shard_manager.frame_indices_between(plan_start, plan_start + len(plan))))
+
+        params = {"dataset": plan.name, **frame, **settings_params}
+        if plan.settings.get("visible_boxes", False):
+            params["visible_boxes"] = True
+        # Frames compostos dependem também do número de instrumentos por frame
+        if composer is not None:
+            params["compose"] = composer.count
+        if manifest.is_done(object_count, params):
+            telemetry.frame_skipped()
+            continue
+
+        rng = shard_manager.frame_random(scenario.seed, object_count)
+        with timer.stage("scene"):
+            apply_scene_variations(plan, frame, scene_defaults)
+        if composer is None:
+            rejected = place_objects(plan, frame, object_manager, annotation_manager, rng, timer)
+
+            # No valid pose: the frame is not rendered and is recorded without outputs
+            if rejected is None:
+                telemetry.frame_rejected(plan.settings.get("max_attempts", 10))
+                manifest.mark_done(object_count, params, [])
+                telemetry.frame_dropped(object_count)
+                continue
+            telemetry.frame_rejected(rejected)
+            annotation_managers = [annotation_manager]
+        else:
+            annotation_managers = compose_frame(scenario, plan, frame, composer, groups, rng, timer, letterbox)
+            if not annotation_managers:
+                manifest.mark_done(object_count, params, [])
+                telemetry.frame_dropped(object_count)
+                continue
+            # Os grupos mudam a cada frame, então os índices dos objetos também
+            if masks or visible_boxes:
+                composed_objects = [obj for manager in annotation_managers for obj in manager.objects]
+                assign_pass_indices([(i + 1, [obj]) for i, obj in enumerate(composed_objects)])
+
+        render_start = time.perf_counter()
+        outputs = render_frame(output_dir, object_count, annotation_managers, timer, writer, letterbox, masks, visibility)
+        render_seconds = time.perf_counter() - render_start
+        if writer is None:
+            manifest.mark_done(object_count, params, outputs)
+        else:
+            written[object_count] = (params, outputs)
+            for frame_index in writer.completed():
+                manifest.mark_done(frame_index, *written.pop(frame_index))
+        telemetry.frame_done(object_count, labels=len(annotation_managers), render_seconds=round(render_seconds, 4))
+
+    if writer is not None:
+        for frame_index in writer.close():
+            manifest.mark_done(frame_index, *written.pop(frame_index))
+    telemetry.finish()
+
+# Generate scenario:
+#   blender -b scene.blend -P main.py -- --output-dir /data/instruments --seed 42 --shard-index K --shard-count N
+if __name__ == "__main__":
+    args = parse_run_args(
+        sys.argv,
+        default_scenario=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scenarios", "instruments.json"),
+        description="Generates the surgical instruments dataset described in the scenario."
+    )
+
+    # Initialize the SceneManager with the camera, circle, plane, lights, and materials
+    camera = bpy.data.objects.get("Camera")
+    plane = bpy.data.objects.get("Plane")
+    light_obj = bpy.data.objects.get("Light")
+    lights = [light_obj] if light_obj else []
+    scene_manager = sceneManager(camera, plane, lights, plane_materials=["Fabric-03"])
+
+    # Groups of objects, their classes and variations are described in the scenario file
+    scenario = load_scenario(args.scenario)
+    if args.seed is not None:
+        scenario.seed = args.seed
+
+    ### 
+
+    # Scenarios
+    camera_configs = {
+        "location": (0, 0, 2),
+        "distortion": (0.1159, 2.8841, -0.0074, 0.0471, -11.8008),
+        "focal_length": 35.0
+    }
+
+    light_configs = {
+        "location": (0, 0, 2),
+        "color": (1, 1, 1),
+        "rotation": (0, 0, 0),
+        "energy": 100
+    }
+
+    scene_manager.setup_scene(camera_configs, light_configs)
+    if args.profile is not None:
+        scene_manager.apply_render_profile(args.profile)
+    apply_output_format(bpy.context.scene, resolve_output_format(args, scenario))
+    # Render at the training input size instead of resizing the images afterwards (see letterbox.py)
+    letterbox = resolve_letterbox(args, scenario)
+    if letterbox is not None:
+        letterbox.configure_scene(bpy.context.scene)
+    output_dir = resolve_output_dir(args, scenario)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    shard_manager = ShardManager(args.shard_index, args.shard_count)
+    telemetry = Telemetry(
+        len(shard_manager.frame_indices(len(scenario))),
+        directory=args.telemetry_dir if args.telemetry_dir is not None else output_dir,
+        shard_index=shard_manager.shard_index
+    )
+    # Background encode/write overlaps the PNG compression with the next render
+    writer = AsyncImageWriter(args.write_workers) if args.write_workers > 0 else None
+    # Instance masks and YOLO-seg labels from the object index pass of the same render
+    masks = args.masks or scenario.settings.get("masks", False)
+    # Several instruments per frame (--compose K or "compose" in the scenario) give more labels per render
+    composer = resolve_composer(args, scenario)
+    generate_scenario(scenario, output_dir, shard_manager, telemetry=telemetry, writer=writer, letterbox=letterbox, masks=masks, composer=composer)
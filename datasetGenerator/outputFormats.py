@@ -0,0 +1,57 @@
+# Formatos de saída das imagens. A especificação é um texto "formato[:nível ou qualidade]"
+# (png:1, png16:6, jpeg:90, webp:85) ou um dict com as mesmas chaves de OUTPUT_FORMATS.
+OUTPUT_FORMATS = {
+    # level é o nível do zlib (0 = sem compressão, 9 = menor arquivo e escrita mais lenta)
+    "png": {"format": "PNG", "level": 6, "color_depth": 8},
+    "png16": {"format": "PNG", "level": 6, "color_depth": 16},
+    "jpeg": {"format": "JPEG", "quality": 90, "color_depth": 8},
+    "webp": {"format": "WEBP", "quality": 90, "color_depth": 8},
+}
+
+# Use this function to turn a format spec into a dict with format, level or quality and color_depth
+def parse_output_format(spec):
+    if spec is None:
+        spec = "png"
+    if isinstance(spec, dict):
+        output_format = dict(OUTPUT_FORMATS[spec.get("name", "png")])
+        output_format.update({key: value for key, value in spec.items() if key != "name"})
+    else:
+        name, _, value = spec.lower().partition(":")
+        if name == "jpg":
+            name = "jpeg"
+        if name not in OUTPUT_FORMATS:
+            raise ValueError(f"Formato '{name}' desconhecido. Opções: {', '.join(OUTPUT_FORMATS)}")
+        output_format = dict(OUTPUT_FORMATS[name])
+        if value:
+            output_format["level" if output_format["format"] == "PNG" else "quality"] = int(value)
+
+    if output_format["format"] == "PNG" and not 0 <= output_format["level"] <= 9:
+        raise ValueError(f"Nível de compressão PNG deve estar entre 0 e 9 (recebido {output_format['level']}).")
+    if output_format["format"] != "PNG":
+        if not 0 <= output_format["quality"] <= 100:
+            raise ValueError(f"Qualidade deve estar entre 0 e 100 (recebido {output_format['quality']}).")
+        if output_format["color_depth"] != 8:
+            raise ValueError(f"{output_format['format']} só aceita 8 bits por canal.")
+    return output_format
+
+def format_label(output_format):
+    if output_format["format"] == "PNG":
+        return f"png{'16' if output_format['color_depth'] == 16 else ''}:{output_format['level']}"
+    return f"{output_format['format'].lower()}:{output_format['quality']}"
+
+# Use this function to apply a format spec to the scene; the file extension is then scene.render.file_extension
+def apply_output_format(scene, spec):
+    output_format = parse_output_format(spec)
+    image_settings = scene.render.image_settings
+    image_settings.file_format = output_format["format"]
+    image_settings.color_depth = str(output_format["color_depth"])
+
+    if output_format["format"] == "PNG":
+        # O Blender usa uma escala de 0 a 100 para a compressão do PNG
+        image_settings.compression = round(output_format["level"] * 100 / 9)
+    else:
+        image_settings.quality = output_format["quality"]
+        # JPEG não tem canal alfa
+        if output_format["format"] == "JPEG" and image_settings.color_mode == "RGBA":
+            image_settings.color_mode = "RGB"
+    return output_format
@@ -0,0 +1,83 @@
+import math
+import random
+
+import numpy as np
+
+# Pose de todos os objetos de um grupo em arrays NumPy (n, 3): localização, rotação Euler XYZ em radianos e escala.
+# As variações (giro, translação, flip, abertura da articulação) mudam só os arrays; matrices() monta as matrizes
+# 4x4 de todos os objetos de uma vez e apply() as grava no Blender com uma escrita por objeto (matrix_basis),
+# em vez de uma escrita por componente. Sem bpy, o módulo pode ser testado e medido fora do Blender.
+class PoseState:
+    def __init__(self, count):
+        self.count = count
+        self.location = np.zeros((count, 3))
+        self.rotation = np.zeros((count, 3))
+        self.scale = np.ones((count, 3))
+        self.flipped = False
+
+    # Same state as ObjectManager.reset_objects: origin, no rotation, unit scale
+    def reset(self):
+        self.location[:] = 0.0
+        self.rotation[:] = 0.0
+        self.scale[:] = 1.0
+        self.flipped = False
+
+    def rotate(self, angle_degrees, axis='x'):
+        if axis not in ('x', 'y', 'z'):
+            raise ValueError("Axis must be 'x', 'y', or 'z'.")
+        self.rotation[:, 'xyz'.index(axis)] += math.radians(angle_degrees)
+
+    # Abre a articulação de um par: o primeiro objeto fica angle_degrees atrás do segundo em z
+    def hinge(self, angle_degrees):
+        if self.count != 2:
+            return
+        self.rotation[0, 2] = self.rotation[1, 2] - math.radians(angle_degrees)
+
+    def flip(self):
+        self.scale[:, 2] *= -1
+        self.flipped = not self.flipped
+
+    # Todos os objetos vão para a posição do primeiro deslocada por (x, y), como em ObjectManager.randomly_move
+    def move_by(self, x, y):
+        self.location[:, 0] = self.location[0, 0] + x
+        self.location[:, 1] = self.location[0, 1] + y
+
+    # Use this function to draw the offset with the same generator calls as ObjectManager.randomly_move (x, then y)
+    def random_move(self, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3), rng=None):
+        if rng is None:
+            rng = random
+        x = rng.uniform(*x_range)
+        y = rng.uniform(*y_range)
+        self.move_by(x, y)
+
+    # Use this function to get the (n, 4, 4) local matrices T @ Rz @ Ry @ Rx @ S (Euler XYZ, as in Blender)
+    def matrices(self):
+        cos, sin = np.cos(self.rotation), np.sin(self.rotation)
+        cx, cy, cz = cos.T
+        sx, sy, sz = sin.T
+        rotation = np.empty((self.count, 3, 3))
+        rotation[:, 0, 0] = cy * cz
+        rotation[:, 0, 1] = sx * sy * cz - cx * sz
+        rotation[:, 0, 2] = cx * sy * cz + sx * sz
+        rotation[:, 1, 0] = cy * sz
+        rotation[:, 1, 1] = sx * sy * sz + cx * cz
+        rotation[:, 1, 2] = cx * sy * sz - sx * cz
+        rotation[:, 2, 0] = -sy
+        rotation[:, 2, 1] = sx * cy
+        rotation[:, 2, 2] = cx * cy
+
+        matrices = np.zeros((self.count, 4, 4))
+        matrices[:, :3, :3] = rotation * self.scale[:, None, :]
+        matrices[:, :3, 3] = self.location
+        matrices[:, 3, 3] = 1.0
+        return matrices
+
+    # Use this function once per frame, after all the variations: writes the pose of every object to Blender.
+    # O Blender não tem escrita em lote de transformações que marque os objetos para o depsgraph
+    # (foreach_set não marca), então uma escrita de matrix_basis por objeto é o mínimo; o caminho antigo
+    # fazia de 6 a 10 escritas por objeto (compare com benchmark_poses.py --objects)
+    def apply(self, objects):
+        from mathutils import Matrix
+
+        for obj, matrix in zip(objects, self.matrices().tolist()):
+            obj.matrix_basis = Matrix(matrix)
@@ -0,0 +1,82 @@
+import glob
+import json
+import os
+
+# Manifesto append-only dos frames renderizados, usado para retomar uma geração interrompida.
+# Cada shard escreve em seu próprio arquivo (manifest_<shard>.jsonl) e todos são lidos ao retomar,
+# então a retomada funciona mesmo com um número de shards diferente.
+class RenderManifest:
+    def __init__(self, directory, shard_index=0):
+        self.directory = directory
+        self.path = os.path.join(directory, f"manifest_{shard_index}.jsonl")
+        self.records = {}
+        self.load()
+
+    def load(self):
+        for path in sorted(glob.glob(os.path.join(self.directory, "manifest_*.jsonl"))):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última linha incompleta de uma execução que caiu no meio da escrita
+                        continue
+                    if record.get("done"):
+                        self.records[record["frame"]] = record
+        if self.records:
+            print(f"Manifesto: {len(self.records)} frames já concluídos em {self.directory}")
+
+        # Termina a linha incompleta para que o próximo registro não seja corrompido
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    # Use this function to check if a frame was already rendered with the same parameters and its files are intact
+    def is_done(self, frame_index, params=None):
+        record = self.records.get(frame_index)
+        if record is None:
+            return False
+        if params is not None and record["params"] != json.loads(json.dumps(params)):
+            return False
+        for path, size in record["outputs"].items():
+            full_path = os.path.join(self.directory, path)
+            if not os.path.exists(full_path) or os.path.getsize(full_path) != size:
+                return False
+        return True
+
+    # Use this function after the frame files are written; every output must exist, otherwise the frame is not
+    # recorded (returns False) and a resume renders it again
+    def mark_done(self, frame_index, params, outputs):
+        missing = [path for path in outputs if not os.path.exists(path)]
+        if missing:
+            print(f"Frame {frame_index} não registrado no manifesto: {', '.join(missing)} não foi gravado.")
+            return False
+        record = {
+            "frame": frame_index,
+            "params": params,
+            "outputs": {os.path.relpath(path, self.directory): os.path.getsize(path) for path in outputs},
+            "done": True,
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records[frame_index] = json.loads(json.dumps(record))
+        return True
+
+# Use this function to get the settings of the run that change the rendered files (seed, image format,
+# resolution and letterbox), to be added to the params of every frame: a resume with other settings renders again
+def run_params(scene, seed, letterbox=None):
+    render = scene.render
+    image_settings = render.image_settings
+    image_format = {"format": image_settings.file_format, "color_mode": image_settings.color_mode, "color_depth": image_settings.color_depth}
+    if image_settings.file_format in ("JPEG", "WEBP"):
+        image_format["quality"] = image_settings.quality
+    return {
+        "seed": seed,
+        "image_format": image_format,
+        "resolution": [render.resolution_x, render.resolution_y, render.resolution_percentage],
+        "letterbox": [letterbox.width, letterbox.height] if letterbox is not None and letterbox.pads else None,
+    }
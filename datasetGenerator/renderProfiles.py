@@ -0,0 +1,86 @@
+import bpy
+
+# Perfis de qualidade/velocidade do render. Cycles na CPU não precisa de contexto OpenGL,
+# então roda nos nós de render sem GPU; Eevee e Workbench precisam de GPU.
+RENDER_PROFILES = {
+    "draft": {
+        "engine": "CYCLES",
+        "samples": 16,
+        "adaptive_threshold": 0.1,
+        "denoiser": "OPENIMAGEDENOISE",
+        "max_bounces": 2,
+        "resolution_percentage": 50,
+    },
+    "train": {
+        "engine": "CYCLES",
+        "samples": 64,
+        "adaptive_threshold": 0.05,
+        "denoiser": "OPENIMAGEDENOISE",
+        "max_bounces": 4,
+        "resolution_percentage": 100,
+    },
+    "hero": {
+        "engine": "CYCLES",
+        "samples": 512,
+        "adaptive_threshold": 0.01,
+        "denoiser": "OPENIMAGEDENOISE",
+        "max_bounces": 12,
+        "resolution_percentage": 100,
+    },
+    # Configuração anterior dos geradores, para máquinas com GPU
+    "eevee": {
+        "engine": "BLENDER_EEVEE_NEXT",
+        "samples": 64,
+        "resolution_percentage": 100,
+    },
+    "workbench": {
+        "engine": "BLENDER_WORKBENCH",
+        "samples": 8,
+        "resolution_percentage": 100,
+    },
+}
+
+# O identificador do Eevee mudou entre versões do Blender (BLENDER_EEVEE / BLENDER_EEVEE_NEXT)
+def resolve_engine(engine):
+    available = bpy.types.RenderSettings.bl_rna.properties["engine"].enum_items.keys()
+    if engine in available:
+        return engine
+    for alternative in ("BLENDER_EEVEE_NEXT", "BLENDER_EEVEE"):
+        if engine.startswith("BLENDER_EEVEE") and alternative in available:
+            return alternative
+    raise ValueError(f"Engine {engine} não disponível nesta versão do Blender.")
+
+# Use this function to apply a named profile (or a dict with the same keys) to the scene
+def apply_render_profile(scene, profile):
+    if isinstance(profile, str):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Perfil '{profile}' desconhecido. Opções: {', '.join(RENDER_PROFILES)}")
+        profile = RENDER_PROFILES[profile]
+
+    scene.render.engine = resolve_engine(profile["engine"])
+    if "resolution" in profile:
+        scene.render.resolution_x, scene.render.resolution_y = profile["resolution"]
+    if "resolution_percentage" in profile:
+        scene.render.resolution_percentage = profile["resolution_percentage"]
+
+    if scene.render.engine == "CYCLES":
+        scene.cycles.device = "CPU"
+        scene.cycles.samples = profile.get("samples", 64)
+        scene.cycles.use_adaptive_sampling = "adaptive_threshold" in profile
+        if "adaptive_threshold" in profile:
+            scene.cycles.adaptive_threshold = profile["adaptive_threshold"]
+        scene.cycles.use_denoising = profile.get("denoiser") is not None
+        if profile.get("denoiser") is not None:
+            scene.cycles.denoiser = profile["denoiser"]
+        if "max_bounces" in profile:
+            bounces = profile["max_bounces"]
+            scene.cycles.max_bounces = bounces
+            scene.cycles.diffuse_bounces = min(bounces, scene.cycles.diffuse_bounces)
+            scene.cycles.glossy_bounces = min(bounces, scene.cycles.glossy_bounces)
+            scene.cycles.transmission_bounces = min(bounces, scene.cycles.transmission_bounces)
+    elif scene.render.engine.startswith("BLENDER_EEVEE"):
+        scene.eevee.taa_render_samples = profile.get("samples", 64)
+    elif scene.render.engine == "BLENDER_WORKBENCH":
+        # Workbench aceita apenas alguns valores fixos de anti-aliasing
+        scene.display.render_aa = str(min((5, 8, 11, 16, 32), key=lambda aa: abs(aa - profile.get("samples", 8))))
+    return profile
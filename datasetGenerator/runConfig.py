@@ -0,0 +1,78 @@
+import argparse
+import bpy
+from letterbox import Letterbox
+from sceneComposer import SceneComposer
+
+# Lê os argumentos passados ao script após "--":
+#   blender -b cena.blend -P main.py -- --scenario cenario.json --output-dir /dados/out --seed 7 --shard-index 0 --shard-count 4
+def parse_run_args(argv, default_scenario=None, description=None):
+    args = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="blender -b <cena.blend> -P <script> --", description=description)
+    parser.add_argument("--scenario", default=default_scenario, help="Arquivo de cenário (.json, .yaml)")
+    parser.add_argument("--output-dir", default=None, help="Pasta de saída (sobrepõe output_dir do cenário)")
+    parser.add_argument("--seed", type=int, default=None, help="Semente (sobrepõe seed do cenário)")
+    parser.add_argument("--shard-index", type=int, default=0, help="Índice deste processo")
+    parser.add_argument("--shard-count", type=int, default=1, help="Número total de processos")
+    parser.add_argument("--animation", action="store_true", help="Renderiza o plano como uma animação")
+    parser.add_argument("--profile", default=None, help="Perfil de render: draft, train, hero, eevee ou workbench")
+    parser.add_argument("--image-format", default=None, help="Formato das imagens: png[:0-9], png16[:0-9], jpeg[:qualidade] ou webp[:qualidade] (sobrepõe image_format do cenário)")
+    parser.add_argument("--training-size", default=None, help="Renderiza no tamanho de treino, ex.: 640 ou 640x640 (sobrepõe training_size do cenário)")
+    parser.add_argument("--letterbox", action="store_true", help="Com --training-size, escala a imagem e adiciona bordas em vez de usar a resolução inteira (só PNG com a transformação Standard ou Raw, sem --animation)")
+    parser.add_argument("--no-letterbox", action="store_true", help="Com --training-size, usa a resolução inteira mesmo com letterbox no cenário")
+    parser.add_argument("--write-workers", type=int, default=0, help="Threads que codificam e gravam as imagens em segundo plano (0 = render(write_still=True))")
+    parser.add_argument("--compose", type=int, default=None, help="Número de instrumentos por frame (sobrepõe compose do cenário)")
+    parser.add_argument("--masks", action="store_true", help="Grava máscaras por instância (PNG) e anotações YOLO-seg do passe Object Index (requer o Cycles)")
+    parser.add_argument("--telemetry-dir", default=None, help="Pasta das métricas .prom e do log de eventos (padrão: pasta de saída)")
+    return parser.parse_args(args)
+
+# Use this function to resolve the output directory from the command line or the scenario
+def resolve_output_dir(args, scenario=None):
+    if args.output_dir is not None:
+        return args.output_dir
+    if scenario is not None and scenario.settings.get("output_dir"):
+        return scenario.settings["output_dir"]
+    raise SystemExit("Informe a pasta de saída com --output-dir.")
+
+# Use this function to resolve the image format spec from the command line or the scenario (see outputFormats.py)
+def resolve_output_format(args, scenario=None):
+    if args.image_format is not None:
+        return args.image_format
+    if scenario is not None and scenario.settings.get("image_format"):
+        return scenario.settings["image_format"]
+    return "png"
+
+# Use this function to get the Letterbox of the run (--training-size or training_size, letterbox and pad_color
+# in the scenario), or None to render at the scene resolution
+def resolve_letterbox(args, scenario=None):
+    settings = scenario.settings if scenario is not None else {}
+    size = args.training_size if args.training_size is not None else settings.get("training_size")
+    if size is None:
+        return None
+    if isinstance(size, str):
+        width, _, height = size.lower().partition("x")
+        size = (int(width), int(height or width))
+    elif isinstance(size, int):
+        size = (size, size)
+
+    # As bordas só são adicionadas pelo caminho dos pixels do Viewer (imageWriter.write_frame), então ficam
+    # desligadas por padrão para que --training-size funcione com --animation, JPEG/WebP e qualquer transformação de cor
+    pad = (args.letterbox or settings.get("letterbox", False)) and not args.no_letterbox
+    return Letterbox(tuple(size), tuple(settings.get("pad_color", (174, 173, 28))), pad)
+
+# Use this function to get the SceneComposer of the run (--compose K, or "compose": K or {"count": K, "area": ..., "margin": ...}
+# in the scenario), or None to render one group of objects per frame
+def resolve_composer(args, scenario=None):
+    settings = scenario.settings.get("compose") if scenario is not None else None
+    if isinstance(settings, int):
+        settings = {"count": settings}
+    settings = dict(settings or {})
+    if args.compose is not None:
+        settings["count"] = args.compose
+    if settings.get("count", 1) <= 1:
+        return None
+    return SceneComposer(**settings)
+
+# Em modo background (blender -b) não há janela: redesenhar a interface é custo puro ou falha
+def redraw_viewport():
+    if not bpy.app.background:
+        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
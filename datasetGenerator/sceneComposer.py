@@ -0,0 +1,92 @@
+import numpy as np
+
+# Composição de vários instrumentos por frame: cada grupo de objetos é representado pela sua pegada
+# no plano da mesa (retângulo orientado em XY) e as posições são sorteadas em lote, testando a
+# sobreposição com os grupos já colocados pelo teorema do eixo separador, tudo vetorizado em NumPy.
+
+# Use this function to get the (n, 4, 2) corners of rectangles with centers (n, 2), half sizes (n, 2) and angles (n,) in radians
+def rectangle_corners(centers, half_sizes, angles):
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    half_sizes = np.asarray(half_sizes, dtype=np.float64).reshape(-1, 2)
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1)
+    signs = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float64)
+    local = signs[None] * half_sizes[:, None]
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    rotated = np.stack([local[..., 0] * cos - local[..., 1] * sin, local[..., 0] * sin + local[..., 1] * cos], axis=-1)
+    return rotated + centers[:, None]
+
+# Use this function to test every rectangle of a (n, 4, 2) against every rectangle of b (m, 4, 2); returns (n, m) booleans.
+# Two rectangles overlap when no edge normal of either one separates their projections (margin widens the gap required)
+def rectangles_overlap(a, b, margin=0.0):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=bool)
+
+    # Duas normais por retângulo (as outras duas arestas são paralelas)
+    def normals(corners):
+        edges = corners[:, 1:3] - corners[:, 0:2]
+        return np.stack([-edges[..., 1], edges[..., 0]], axis=-1) / np.linalg.norm(edges, axis=-1, keepdims=True)
+
+    # Eixos de cada par (n, m, 4, 2)
+    axes = np.concatenate([
+        np.broadcast_to(normals(a)[:, None], (len(a), len(b), 2, 2)),
+        np.broadcast_to(normals(b)[None], (len(a), len(b), 2, 2)),
+    ], axis=2)
+    # Projeções dos cantos em cada eixo (n, m, 4 eixos, 4 cantos)
+    projected_a = np.einsum("nmkd,ncd->nmkc", axes, a)
+    projected_b = np.einsum("nmkd,mcd->nmkc", axes, b)
+    separated = (projected_a.max(axis=3) + margin <= projected_b.min(axis=3)) | (projected_b.max(axis=3) + margin <= projected_a.min(axis=3))
+    return ~separated.any(axis=2)
+
+# Use this function to get the footprint of a group from the world corners of its objects (n, 8, 3+) at rotation 0
+# and location 0: the (center, half size) of the box containing them in XY
+def footprint(world_corners):
+    points = np.asarray(world_corners, dtype=np.float64)[..., :2].reshape(-1, 2)
+    low, high = points.min(axis=0), points.max(axis=0)
+    return (low + high) / 2, (high - low) / 2
+
+class SceneComposer:
+    # area: ((x_min, x_max), (y_min, y_max)) da mesa em que os grupos devem caber inteiros;
+    # margin: folga mínima entre pegadas; candidates: posições sorteadas por rodada para cada grupo
+    def __init__(self, count=3, area=((-0.3, 0.3), (-0.3, 0.3)), margin=0.01, candidates=64, rounds=4):
+        self.count = count
+        self.area = np.asarray(area, dtype=np.float64)
+        self.margin = margin
+        self.candidates = candidates
+        self.rounds = rounds
+
+    # Use this function to place groups without overlap. footprints is a list of (center, half size) in the group frame
+    # (the group rotates around the origin); angles[i] fixes the rotation of group i, or None to draw it.
+    # rng is a numpy Generator. Returns one (x, y, angle) per group, or None for the groups that did not fit
+    def place(self, footprints, rng, angles=None):
+        if angles is None:
+            angles = [None] * len(footprints)
+        placements = [None] * len(footprints)
+        placed = np.empty((0, 4, 2))
+        # Os grupos maiores são colocados primeiro, quando a mesa ainda está vazia
+        order = sorted(range(len(footprints)), key=lambda i: -np.prod(footprints[i][1]))
+        for i in order:
+            center, half_size = footprints[i]
+            for _ in range(self.rounds):
+                count = self.candidates
+                if angles[i] is None:
+                    candidate_angles = rng.uniform(0, 2 * np.pi, count)
+                else:
+                    candidate_angles = np.full(count, angles[i])
+                translations = np.stack([rng.uniform(*self.area[0], count), rng.uniform(*self.area[1], count)], axis=1)
+                # O centro da pegada gira com o grupo em torno da origem e depois é transladado
+                cos, sin = np.cos(candidate_angles), np.sin(candidate_angles)
+                centers = translations + np.stack([center[0] * cos - center[1] * sin, center[0] * sin + center[1] * cos], axis=1)
+                corners = rectangle_corners(centers, np.broadcast_to(half_size, (count, 2)), candidate_angles)
+
+                inside = (
+                    (corners[..., 0].min(axis=1) >= self.area[0, 0]) & (corners[..., 0].max(axis=1) <= self.area[0, 1])
+                    & (corners[..., 1].min(axis=1) >= self.area[1, 0]) & (corners[..., 1].max(axis=1) <= self.area[1, 1])
+                )
+                free = inside & ~rectangles_overlap(corners, placed, self.margin).any(axis=1)
+                if free.any():
+                    chosen = int(np.argmax(free))
+                    placements[i] = (float(translations[chosen, 0]), float(translations[chosen, 1]), float(candidate_angles[chosen]))
+                    placed = np.concatenate([placed, corners[chosen:chosen + 1]])
+                    break
+        return placements
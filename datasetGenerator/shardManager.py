@@ -0,0 +1,28 @@
+import random
+
+class ShardManager:
+    def __init__(self, shard_index=0, shard_count=1):
+        if shard_count < 1:
+            raise ValueError("shard_count deve ser maior ou igual a 1.")
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"shard_index deve estar entre 0 e {shard_count - 1}.")
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    # Use this function to check if a global frame index belongs to this shard
+    # Os frames são distribuídos de forma intercalada (i % N) para equilibrar a carga entre os processos
+    def owns(self, frame_index):
+        return frame_index % self.shard_count == self.shard_index
+
+    # Use this function to list the global frame indices rendered by this shard
+    def frame_indices(self, total_frames):
+        return range(self.shard_index, total_frames, self.shard_count)
+
+    # Gerador aleatório próprio de cada frame, assim o resultado não depende de qual shard o renderiza
+    def frame_random(self, seed, frame_index):
+        return random.Random(f"{seed}:{frame_index}")
+
+    # Use this function to list the frames of this shard inside [start, stop), e.g. one dataset of a scenario
+    def frame_indices_between(self, start, stop):
+        first = start + (self.shard_index - start) % self.shard_count
+        return range(first, stop, self.shard_count)
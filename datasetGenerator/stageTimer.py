@@ -0,0 +1,47 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+
+# Mede o tempo de cada etapa do laço de geração (pose, atualização do depsgraph, render, ...)
+class StageTimer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.samples = {}
+
+    # Use this function as "with timer.stage('render'):" around each stage of the loop
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    # Use this function to get count, total and percentiles (in milliseconds) of every stage
+    def summary(self, percentiles=(50, 90, 99)):
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            stats = {
+                "count": len(ordered),
+                "total_s": round(sum(ordered), 4),
+                "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+            }
+            for p in percentiles:
+                # Percentil pelo método nearest-rank
+                rank = max(1, math.ceil(p / 100 * len(ordered)))
+                stats[f"p{p}_ms"] = round(1000 * ordered[rank - 1], 3)
+            stats["max_ms"] = round(1000 * ordered[-1], 3)
+            result[name] = stats
+        return result
+
+    def write_json(self, path, extra=None):
+        report = dict(extra) if extra else {}
+        report["stages"] = self.summary()
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return report
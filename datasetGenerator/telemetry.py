@@ -0,0 +1,200 @@
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows não tem o módulo resource; o pico de memória não é reportado
+    resource = None
+
+# Pico de memória residente do processo, em bytes (ru_maxrss é em KB no Linux e em bytes no macOS)
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Telemetria da geração: taxa de frames suavizada (média móvel exponencial), ETA por dataset,
+# poses rejeitadas e pico de memória, exportados em um arquivo textfile do Prometheus e em um log JSONL
+class Telemetry:
+    def __init__(self, total_frames, directory=None, shard_index=0, alpha=0.2, name="generation"):
+        self.total_frames = total_frames
+        self.shard_index = shard_index
+        self.alpha = alpha
+        self.metrics_path = None
+        self.events_path = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.metrics_path = os.path.join(directory, f"{name}_{shard_index}.prom")
+            self.events_path = os.path.join(directory, f"events_{shard_index}.jsonl")
+
+        self.frames_done = 0
+        self.frames_skipped = 0
+        self.rejected_poses = 0
+        self.dropped_frames = 0
+        # Anotações e tempo de render informados em frame_done(labels=..., render_seconds=...)
+        self.labels_done = 0
+        self.render_seconds = 0.0
+        self.seconds_per_frame = None
+        self.dataset = None
+        self.dataset_total = 0
+        self.dataset_done = 0
+        self.start_time = time.time()
+        self.last_time = self.start_time
+        self.event("start", total_frames=total_frames)
+
+    # Use this function when the loop moves to a new dataset; total_frames is the number of frames of this shard
+    def start_dataset(self, name, total_frames):
+        self.dataset = name
+        self.dataset_total = total_frames
+        self.dataset_done = 0
+        self.event("dataset", frames=total_frames)
+
+    # Frames já concluídos (manifesto) saem do total sem afetar a taxa
+    def frame_skipped(self):
+        self.frames_skipped += 1
+        self.dataset_done += 1
+        self.last_time = time.time()
+
+    def frame_rejected(self, count=1):
+        self.rejected_poses += count
+
+    def frame_dropped(self, frame_index):
+        self.dropped_frames += 1
+        self.frame_done(frame_index, dropped=True)
+
+    # Use this function after each frame is written; updates the smoothed rate, prints progress and exports metrics
+    def frame_done(self, frame_index, **fields):
+        now = time.time()
+        elapsed = now - self.last_time
+        self.last_time = now
+        if self.seconds_per_frame is None:
+            self.seconds_per_frame = elapsed
+        else:
+            self.seconds_per_frame = self.alpha * elapsed + (1 - self.alpha) * self.seconds_per_frame
+
+        self.frames_done += 1
+        self.dataset_done += 1
+        self.labels_done += fields.get("labels", 0)
+        self.render_seconds += fields.get("render_seconds", 0.0)
+        self.event("frame", frame=frame_index, seconds=round(elapsed, 4), **fields)
+        self.write_metrics()
+        print(
+            f"{self.dataset} {self.dataset_done}/{self.dataset_total} | "
+            f"{self.frames_per_minute():.1f} frames/min | "
+            f"ETA dataset: {self.format_eta(self.dataset_eta())} | "
+            f"ETA total: {self.format_eta(self.total_eta())}"
+        )
+
+    # Use this function when several frames finish together (render(animation=True)); the elapsed
+    # time is split evenly between them
+    def batch_done(self, frame_indices):
+        if not frame_indices:
+            return
+        now = time.time()
+        elapsed = (now - self.last_time) / len(frame_indices)
+        self.last_time = now
+        if self.seconds_per_frame is None:
+            self.seconds_per_frame = elapsed
+        else:
+            self.seconds_per_frame = self.alpha * elapsed + (1 - self.alpha) * self.seconds_per_frame
+
+        self.frames_done += len(frame_indices)
+        self.dataset_done += len(frame_indices)
+        self.event("batch", frames=len(frame_indices), seconds_per_frame=round(elapsed, 4))
+        self.write_metrics()
+        print(
+            f"{self.dataset} {self.dataset_done}/{self.dataset_total} | "
+            f"{self.frames_per_minute():.1f} frames/min | "
+            f"ETA total: {self.format_eta(self.total_eta())}"
+        )
+
+    # Anotações por segundo de render: a métrica de rendimento do compositor de cenas
+    def labels_per_render_second(self):
+        if not self.render_seconds:
+            return None
+        return self.labels_done / self.render_seconds
+
+    def frames_per_minute(self):
+        if not self.seconds_per_frame:
+            return 0.0
+        return 60.0 / self.seconds_per_frame
+
+    def dataset_eta(self):
+        return self.eta(self.dataset_total - self.dataset_done)
+
+    def total_eta(self):
+        return self.eta(self.total_frames - self.frames_done - self.frames_skipped)
+
+    def eta(self, remaining_frames):
+        if self.seconds_per_frame is None:
+            return None
+        return max(0, remaining_frames) * self.seconds_per_frame
+
+    def format_eta(self, seconds):
+        if seconds is None:
+            return "--"
+        hours, rest = divmod(int(seconds), 3600)
+        minutes, seconds = divmod(rest, 60)
+        return f"{hours:d}h{minutes:02d}m{seconds:02d}s"
+
+    # Use this function to append one JSON line to the event log
+    def event(self, kind, **fields):
+        if self.events_path is None:
+            return
+        record = {"time": round(time.time(), 3), "event": kind, "shard": self.shard_index, "dataset": self.dataset}
+        record.update(fields)
+        with open(self.events_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    # Escreve o arquivo do textfile collector de forma atômica (arquivo temporário + os.replace)
+    def write_metrics(self):
+        if self.metrics_path is None:
+            return
+        labels = f'shard="{self.shard_index}",dataset="{self.dataset}"'
+        metrics = [
+            ("synthetic_frames_done_total", "counter", "Frames renderizados", self.frames_done),
+            ("synthetic_frames_skipped_total", "counter", "Frames pulados pelo manifesto", self.frames_skipped),
+            ("synthetic_rejected_poses_total", "counter", "Poses rejeitadas antes do render", self.rejected_poses),
+            ("synthetic_dropped_frames_total", "counter", "Frames descartados sem pose válida", self.dropped_frames),
+            ("synthetic_labels_total", "counter", "Anotações geradas", self.labels_done),
+            ("synthetic_labels_per_render_second", "gauge", "Anotações por segundo de render", self.labels_per_render_second()),
+            ("synthetic_frames_per_minute", "gauge", "Taxa suavizada de frames por minuto", self.frames_per_minute()),
+            ("synthetic_dataset_eta_seconds", "gauge", "Tempo restante estimado do dataset", self.dataset_eta()),
+            ("synthetic_total_eta_seconds", "gauge", "Tempo restante estimado da geração", self.total_eta()),
+            ("synthetic_peak_rss_bytes", "gauge", "Pico de memória residente", peak_rss_bytes()),
+        ]
+        lines = []
+        for name, kind, help_text, value in metrics:
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{{{labels}}} {value}")
+
+        temporary_path = self.metrics_path + ".tmp"
+        with open(temporary_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self.metrics_path)
+
+    def finish(self):
+        self.write_metrics()
+        self.event(
+            "finish",
+            frames_done=self.frames_done,
+            frames_skipped=self.frames_skipped,
+            rejected_poses=self.rejected_poses,
+            dropped_frames=self.dropped_frames,
+            labels=self.labels_done,
+            labels_per_render_second=self.labels_per_render_second(),
+            elapsed=round(time.time() - self.start_time, 3),
+            peak_rss_bytes=peak_rss_bytes(),
+        )
+        print(
+            f"Concluído: {self.frames_done} frames | {self.frames_skipped} pulados | "
+            f"{self.rejected_poses} poses rejeitadas | {self.dropped_frames} descartados"
+        )
+        if self.labels_per_render_second() is not None:
+            print(f"{self.labels_done} anotações | {self.labels_per_render_second():.2f} anotações/s de render")
@@ -0,0 +1,161 @@
+import bisect
+import json
+import os
+import sys
+
+# Plano de variações de um dataset: produto cartesiano dos eixos, enumerado de forma preguiçosa.
+# O frame i é obtido diretamente pela decomposição de i em base mista, sem gerar o produto inteiro.
+class VariationPlan:
+    def __init__(self, name, axes, cycles=None, tables=None, settings=None):
+        if cycles is None:
+            cycles = []
+        if tables is None:
+            tables = {}
+        if settings is None:
+            settings = {}
+        self.name = name
+        # Lista de (nome, valores) na ordem dos laços: o primeiro eixo é o mais externo
+        self.axes = axes
+        # Eixos que não multiplicam o número de frames: o frame i recebe valores[i % len(valores)]
+        self.cycles = cycles
+        # Tabelas de consulta dos eixos definidos como mapa (ex.: temperatura -> cor da luz)
+        self.tables = tables
+        self.settings = settings
+
+        self.strides = []
+        stride = 1
+        for _, values in reversed(self.axes):
+            self.strides.append(stride)
+            stride *= len(values)
+        self.strides.reverse()
+        self.frame_count = stride
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.frame_count
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"Frame {index} fora do plano '{self.name}' ({self.frame_count} frames).")
+
+        frame = {}
+        for (name, values), stride in zip(self.axes, self.strides):
+            frame[name] = values[(index // stride) % len(values)]
+        for name, values in self.cycles:
+            frame[name] = values[index % len(values)]
+        return frame
+
+    def __iter__(self):
+        for index in range(self.frame_count):
+            yield self[index]
+
+    # Use this function to get the number of values of each axis without enumerating frames
+    def cardinality(self):
+        return {name: len(values) for name, values in self.axes + self.cycles}
+
+    def values(self, axis):
+        for name, values in self.axes + self.cycles:
+            if name == axis:
+                return values
+        return []
+
+# Conjunto de planos de um arquivo de cenário, com numeração global contínua entre os datasets
+class ScenarioPlan:
+    def __init__(self, plans, seed=42, settings=None):
+        if settings is None:
+            settings = {}
+        self.plans = plans
+        self.seed = seed
+        self.settings = settings
+
+        # Índice global do primeiro frame de cada plano
+        self.offsets = []
+        offset = 0
+        for plan in plans:
+            self.offsets.append(offset)
+            offset += len(plan)
+        self.frame_count = offset
+
+    def __len__(self):
+        return self.frame_count
+
+    # Retorna (plano, índice local, parâmetros do frame) para um índice global
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.frame_count
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"Frame {index} fora do cenário ({self.frame_count} frames).")
+        # bisect_right pula os planos vazios, que compartilham o offset do plano seguinte
+        plan_index = bisect.bisect_right(self.offsets, index) - 1
+        plan = self.plans[plan_index]
+        local_index = index - self.offsets[plan_index]
+        return plan, local_index, plan[local_index]
+
+    def summary(self):
+        return {
+            "frames": self.frame_count,
+            "datasets": [
+                {"name": plan.name, "frames": len(plan), "axes": plan.cardinality()}
+                for plan in self.plans
+            ],
+        }
+
+def parse_axis(name, spec):
+    # {"start": 0, "stop": 360, "step": 15} vira um range, que tem acesso O(1) sem ser materializado
+    if isinstance(spec, dict) and "stop" in spec:
+        return range(spec.get("start", 0), spec["stop"], spec.get("step", 1)), None
+    # Um mapa (ex.: {"4500": [1.0, 0.85, 0.7]}) usa as chaves como valores e guarda a tabela de consulta
+    if isinstance(spec, dict):
+        table = {}
+        for key, value in spec.items():
+            key = int(key) if isinstance(key, str) and key.lstrip("-").isdigit() else key
+            table[key] = tuple(value) if isinstance(value, list) else value
+        return list(table.keys()), table
+    if not isinstance(spec, list):
+        raise ValueError(f"Eixo '{name}' deve ser uma lista, um intervalo ou um mapa.")
+    return [tuple(value) if isinstance(value, list) else value for value in spec], None
+
+def build_plan(spec, defaults=None):
+    if defaults is None:
+        defaults = {}
+    settings = dict(defaults)
+    settings.update({key: value for key, value in spec.items() if key not in ("axes", "cycles")})
+
+    axes = []
+    cycles = []
+    tables = {}
+    for target, section in ((axes, "axes"), (cycles, "cycles")):
+        for name, axis_spec in spec.get(section, {}).items():
+            values, table = parse_axis(name, axis_spec)
+            if section == "cycles" and len(values) == 0:
+                raise ValueError(f"Ciclo '{name}' do dataset '{spec.get('name')}' não pode ser vazio.")
+            target.append((name, values))
+            if table is not None:
+                tables[name] = table
+
+    return VariationPlan(settings.get("name", "dataset"), axes, cycles, tables, settings)
+
+# Use this function to compile a scenario file (.json, .yaml or .yml) into a ScenarioPlan
+def load_scenario(path):
+    with open(path, "r") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML não está instalado no Python do Blender; use um cenário .json.")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+
+    defaults = spec.get("defaults", {})
+    plans = [build_plan(dataset, defaults) for dataset in spec.get("datasets", [])]
+    settings = {key: value for key, value in spec.items() if key not in ("datasets", "defaults")}
+    return ScenarioPlan(plans, seed=spec.get("seed", 42), settings=settings)
+
+if __name__ == "__main__":
+    # Mostra o tamanho do cenário sem renderizar nada: python variationPlan.py cenario.json
+    if len(sys.argv) < 2:
+        print("Uso: python variationPlan.py <cenario.json|yaml>")
+        sys.exit(1)
+    print(json.dumps(load_scenario(sys.argv[1]).summary(), indent=2))
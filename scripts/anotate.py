@@ -1,14 +1,20 @@
 import cv2
 import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from letterbox_cache import LetterboxCache
 
 # Configurações
 RESIZED_WIDTH = 640
 RESIZED_HEIGHT = 640
-SAVE_RESIZED_IMAGES = True
+# Grava uma cópia redimensionada de cada imagem em RESIZED_IMAGE_FOLDER, pela thread de pré-carregamento;
+# desligado por padrão: as imagens com letterbox já ficam em CACHE_FOLDER
+SAVE_RESIZED_IMAGES = False
 RESIZED_IMAGE_FOLDER = "../dataset/images640"
 IMAGE_FOLDER = "../dataset/images"
 LABEL_FOLDER = "../dataset/labels"
+# Imagens com letterbox, pré-processadas com: python letterbox_cache.py --images ../dataset/images --cache ../dataset/cache
+CACHE_FOLDER = "../dataset/cache"
 CLASSES = ["afastador", "bisturi", "dissecacao", "tesoura", "mosquito", "allis"]
 
 os.makedirs(RESIZED_IMAGE_FOLDER, exist_ok=True)
@@ -17,42 +23,115 @@ os.makedirs(LABEL_FOLDER, exist_ok=True)
 current_class = 0
 drawing = False
 ix, iy = -1, -1
-bbox = []
-
-def letterbox(img, new_shape=(640, 640), color=(174, 173, 28)):
-    shape = img.shape[:2]  # (h, w)
-    ratio = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-    new_unpadded = (int(round(shape[1] * ratio)), int(round(shape[0] * ratio)))
-    img_resized = cv2.resize(img, new_unpadded, interpolation=cv2.INTER_LINEAR)
-
-    dw = new_shape[1] - new_unpadded[0]
-    dh = new_shape[0] - new_unpadded[1]
-    top, bottom = dh // 2, dh - dh // 2
-    left, right = dw // 2, dw - dw // 2
-
-    img_padded = cv2.copyMakeBorder(img_resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
-    return img_padded, ratio, (left, top)
+canvas = None
+
+BOX_COLOR = (0, 255, 0)
+TEXT_COLOR = (255, 0, 0)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Imagem exibida e caixas da imagem atual. Cada mudança redesenha só o retângulo afetado (a partir da
+# imagem limpa e das caixas que o cruzam), sem copiar a imagem inteira por evento do mouse
+class AnnotationCanvas:
+    def __init__(self, base):
+        self.base = base
+        self.image = base.copy()
+        self.boxes = []
+        self.redo_stack = []
+        self.preview = None
+
+    # Região ocupada por um retângulo (com a espessura da linha) e pelo nome da classe acima dele
+    def region(self, box):
+        cls_id, x1, y1, x2, y2 = box
+        h, w = self.image.shape[:2]
+        if cls_id is None:
+            top, right = y1 - 2, x2 + 2
+        else:
+            (text_w, text_h), baseline = cv2.getTextSize(CLASSES[cls_id], FONT, 0.5, 2)
+            top, right = y1 - 10 - text_h - 2, max(x2, x1 + text_w) + 2
+        return max(0, min(x1, x2) - 2), max(0, top), min(w, right + 1), min(h, max(y1, y2) + 3)
+
+    def draw_box(self, target, box, origin):
+        cls_id, x1, y1, x2, y2 = box
+        ox, oy = origin
+        cv2.rectangle(target, (x1 - ox, y1 - oy), (x2 - ox, y2 - oy), BOX_COLOR, 2)
+        if cls_id is not None:
+            cv2.putText(target, CLASSES[cls_id], (x1 - ox, y1 - 10 - oy), FONT, 0.5, TEXT_COLOR, 2)
+
+    # Restaura a região a partir da imagem limpa e redesenha só as caixas que a cruzam
+    def redraw(self, region):
+        x0, y0, x1, y1 = region
+        if x0 >= x1 or y0 >= y1:
+            return
+        view = self.image[y0:y1, x0:x1]
+        view[...] = self.base[y0:y1, x0:x1]
+        for box in self.boxes:
+            bx0, by0, bx1, by1 = self.region(box)
+            if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                self.draw_box(view, box, (x0, y0))
+
+    def show_preview(self, x1, y1, x2, y2):
+        if self.preview is not None:
+            self.redraw(self.region(self.preview))
+        self.preview = [None, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)]
+        self.draw_box(self.image, self.preview, (0, 0))
+
+    def add(self, box):
+        if self.preview is not None:
+            self.redraw(self.region(self.preview))
+            self.preview = None
+        self.boxes.append(box)
+        self.redo_stack.clear()
+        self.draw_box(self.image, box, (0, 0))
+
+    def undo(self):
+        if not self.boxes:
+            return None
+        box = self.boxes.pop()
+        self.redo_stack.append(box)
+        self.redraw(self.region(box))
+        return box
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        box = self.redo_stack.pop()
+        self.boxes.append(box)
+        self.draw_box(self.image, box, (0, 0))
+        return box
+
+    # Troca a classe da última caixa; o nome antigo e o novo podem ter larguras diferentes
+    def set_last_class(self, cls_id):
+        if not self.boxes:
+            return None
+        old_region = self.region(self.boxes[-1])
+        self.boxes[-1] = [cls_id] + self.boxes[-1][1:]
+        new_region = self.region(self.boxes[-1])
+        self.redraw((min(old_region[0], new_region[0]), min(old_region[1], new_region[1]), max(old_region[2], new_region[2]), max(old_region[3], new_region[3])))
+        return self.boxes[-1]
+
+    def reset(self):
+        self.boxes = []
+        self.redo_stack = []
+        self.preview = None
+        self.image[...] = self.base
 
 def draw_bbox(event, x, y, flags, param):
-    global ix, iy, drawing, bbox, img
+    global ix, iy, drawing
 
     if event == cv2.EVENT_LBUTTONDOWN:
         drawing = True
         ix, iy = x, y
 
     elif event == cv2.EVENT_MOUSEMOVE and drawing:
-        temp = img.copy()
-        cv2.rectangle(temp, (ix, iy), (x, y), (0, 255, 0), 2)
-        cv2.imshow("image", temp)
+        canvas.show_preview(ix, iy, x, y)
+        cv2.imshow("image", canvas.image)
 
     elif event == cv2.EVENT_LBUTTONUP:
         drawing = False
         x_min, x_max = sorted([ix, x])
         y_min, y_max = sorted([iy, y])
-        bbox.append([current_class, x_min, y_min, x_max, y_max])
-        cv2.rectangle(img, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
-        cv2.putText(img, CLASSES[current_class], (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,0,0), 2)
-        cv2.imshow("image", img)
+        canvas.add([current_class, x_min, y_min, x_max, y_max])
+        cv2.imshow("image", canvas.image)
 
 def save_annotations(label_path, bbox_list, img_width, img_height):
     with open(label_path, 'w') as f:
@@ -63,26 +142,34 @@ def save_annotations(label_path, bbox_list, img_width, img_height):
             h = (y2 - y1) / img_height
             f.write(f"{cls_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}\n")
 
-# Loop por imagem
-for filename in sorted(os.listdir(IMAGE_FOLDER)):
-    if not filename.lower().endswith((".jpg", ".jpeg", ".png")):
-        continue
-
-    img_path = os.path.join(IMAGE_FOLDER, filename)
-    label_path = os.path.join(LABEL_FOLDER, os.path.splitext(filename)[0] + ".txt")
-    bbox = []
-
-    original_img = cv2.imread(img_path)
-    img, ratio, (pad_x, pad_y) = letterbox(original_img, new_shape=(RESIZED_HEIGHT, RESIZED_WIDTH))
+cache = LetterboxCache(CACHE_FOLDER, (RESIZED_HEIGHT, RESIZED_WIDTH))
 
+# Lê a imagem do cache (ou aplica o letterbox, se ela ainda não foi pré-processada)
+def load_image(filename):
+    img = cache.load(os.path.join(IMAGE_FOLDER, filename))
     if SAVE_RESIZED_IMAGES:
         resized_save_path = os.path.join(RESIZED_IMAGE_FOLDER, filename)
         cv2.imwrite(resized_save_path, img)
+    return img
+
+filenames = [filename for filename in sorted(os.listdir(IMAGE_FOLDER)) if filename.lower().endswith((".jpg", ".jpeg", ".png"))]
+
+# Uma thread carrega a próxima imagem enquanto a atual é anotada
+prefetcher = ThreadPoolExecutor(max_workers=1)
+next_image = prefetcher.submit(load_image, filenames[0]) if filenames else None
+
+# Loop por imagem
+for position, filename in enumerate(filenames):
+    label_path = os.path.join(LABEL_FOLDER, os.path.splitext(filename)[0] + ".txt")
+
+    img = next_image.result()
+    if position + 1 < len(filenames):
+        next_image = prefetcher.submit(load_image, filenames[position + 1])
 
     h, w = img.shape[:2]
-    clone = img.copy()
+    canvas = AnnotationCanvas(img)
 
-    cv2.imshow("image", img)
+    cv2.imshow("image", canvas.image)
     cv2.setMouseCallback("image", draw_bbox)
 
     while True:
@@ -92,30 +179,43 @@ for filename in sorted(os.listdir(IMAGE_FOLDER)):
             current_class = (current_class + 1) % len(CLASSES)
             print(f"Classe atual: {CLASSES[current_class]} ({current_class})")
 
+        elif key == ord('v'):
+            changed = canvas.set_last_class(current_class)
+            if changed:
+                print(f"Classe da última bounding box: {CLASSES[current_class]}")
+                cv2.imshow("image", canvas.image)
+
         elif key == ord('s'):
-            save_annotations(label_path, bbox, w, h)
+            save_annotations(label_path, canvas.boxes, w, h)
             print(f"Anotações salvas para {filename}")
             break
 
         elif key == ord('r'):
-            bbox = []
-            img = clone.copy()
-            cv2.imshow("image", img)
+            canvas.reset()
+            cv2.imshow("image", canvas.image)
 
         elif key == ord('d'):
-            if bbox:
-                removed = bbox.pop()
+            removed = canvas.undo()
+            if removed:
                 print(f"Bounding box removida: {removed}")
-                img = clone.copy()
-                for cls_id, x1, y1, x2, y2 in bbox:
-                    cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(img, CLASSES[cls_id], (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,0,0), 2)
-                cv2.imshow("image", img)
+                cv2.imshow("image", canvas.image)
             else:
                 print("Nenhuma bounding box para remover.")
 
+        elif key == ord('y'):
+            restored = canvas.redo()
+            if restored:
+                print(f"Bounding box restaurada: {restored}")
+                cv2.imshow("image", canvas.image)
+            else:
+                print("Nenhuma bounding box para restaurar.")
+
         elif key == 27:  # ESC
             print("Saindo...")
+            prefetcher.shutdown()
+            cache.save()
             exit()
 
+prefetcher.shutdown()
+cache.save()
 cv2.destroyAllWindows()
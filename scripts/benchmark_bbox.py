@@ -0,0 +1,59 @@
+import bpy
+import bpy_extras
+import sys
+import time
+import argparse
+from mathutils import Vector
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from bboxProjector import BoundingBoxProjector
+
+# Compara a projeção por canto (world_to_camera_view) com a projeção em lote do BoundingBoxProjector.
+# Uso: blender -b cena.blend -P benchmark_bbox.py -- --objects Mosquito.001 Mosquito.002 --repeat 2000
+
+def per_corner_bounding_box(scene, objects):
+    cam = scene.camera
+    bbox_corners = [
+        bpy_extras.object_utils.world_to_camera_view(scene, cam, obj.matrix_world @ Vector(corner))
+        for obj in objects
+        for corner in obj.bound_box
+    ]
+    min_x = min(corner.x for corner in bbox_corners) * scene.render.resolution_x
+    max_x = max(corner.x for corner in bbox_corners) * scene.render.resolution_x
+    min_y = min(corner.y for corner in bbox_corners) * scene.render.resolution_y
+    max_y = max(corner.y for corner in bbox_corners) * scene.render.resolution_y
+    return (min_x, min_y, max_x, max_y)
+
+def benchmark(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", nargs="+", default=None, help="Objetos a anotar (padrão: todas as malhas)")
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--mode", choices=["bound_box", "vertices"], default="bound_box", help="vertices mede as caixas justas")
+    args = parser.parse_args(argv)
+
+    scene = bpy.context.scene
+    if args.objects:
+        objects = [bpy.data.objects[name] for name in args.objects]
+    else:
+        objects = [obj for obj in scene.objects if obj.type == 'MESH']
+    projector = BoundingBoxProjector(scene, mode=args.mode)
+    # Lê os vértices para o cache antes de medir, como acontece no primeiro frame
+    projector.get_bounding_box(objects)
+
+    corner_time, corner_box = benchmark(lambda: per_corner_bounding_box(scene, objects), args.repeat)
+    numpy_time, numpy_box = benchmark(lambda: projector.get_bounding_box(objects), args.repeat)
+    difference = max(abs(a - b) for a, b in zip(corner_box, numpy_box))
+
+    print(f"Objetos: {len(objects)} ({8 * len(objects)} cantos) | Repetições: {args.repeat}")
+    print(f"world_to_camera_view: {corner_time * 1e6:.1f} us/frame")
+    print(f"NumPy ({args.mode}):  {numpy_time * 1e6:.1f} us/frame ({corner_time / numpy_time:.1f}x)")
+    # No modo vertices a caixa é mais justa, então a diferença mostra quanto foi reduzida
+    print(f"Diferença máxima: {difference:.2e} px")
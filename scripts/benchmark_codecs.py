@@ -0,0 +1,88 @@
+import bpy
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from outputFormats import apply_output_format, format_label, parse_output_format
+from imageWriter import prepare_viewer, read_render_pixels, encode_settings, encode_png, to_display
+
+# Mede o tempo de escrita e o tamanho por frame de cada formato de saída, a partir de um único render.
+# Uso: blender -b cena.blend -P benchmark_codecs.py -- --codecs png:1 png:6 png:9 png16:6 jpeg:90 webp:90 --repeat 5
+# Com --writer, os formatos PNG também são medidos com o codificador da escrita em segundo plano (--write-workers).
+
+DEFAULT_CODECS = ["png:0", "png:1", "png:3", "png:6", "png:9", "png16:6", "jpeg:95", "jpeg:90", "jpeg:75", "webp:95", "webp:90", "webp:75"]
+
+def benchmark_codec(scene, spec, repeat, output_dir, pixels=None):
+    output_format = apply_output_format(scene, spec)
+    label = format_label(output_format)
+    file_path = os.path.join(output_dir, f"{label.replace(':', '_')}{scene.render.file_extension}")
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bpy.data.images["Render Result"].save_render(filepath=file_path)
+        times.append(time.perf_counter() - start)
+
+    result = {
+        "codec": label,
+        "bytes_per_frame": os.path.getsize(file_path),
+        "write_s": round(sum(times) / len(times), 4),
+        "min_s": round(min(times), 4),
+        "max_s": round(max(times), 4),
+    }
+
+    # Mesmo formato gravado pelo AsyncImageWriter (NumPy + zlib)
+    settings = encode_settings(scene) if pixels is not None and output_format["format"] == "PNG" else None
+    # Com uma transformação de cor que o writer não reproduz, o PNG também é gravado pelo Blender
+    if settings is not None and not settings["blender_color"]:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = encode_png(to_display(pixels, settings), settings["level"])
+            times.append(time.perf_counter() - start)
+        result["writer_bytes_per_frame"] = len(data)
+        result["writer_encode_s"] = round(sum(times) / len(times), 4)
+    return result
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codecs", nargs="+", default=DEFAULT_CODECS, help="Formatos como em --image-format")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--writer", action="store_true", help="Mede também o codificador PNG da escrita em segundo plano")
+    parser.add_argument("--output", default=None, help="Arquivo JSON com os resultados")
+    args = parser.parse_args(argv)
+
+    # Valida todos os formatos antes do render
+    for spec in args.codecs:
+        parse_output_format(spec)
+
+    scene = bpy.context.scene
+    if args.writer:
+        apply_output_format(scene, "png")
+        prepare_viewer(scene)
+
+    # Um único render; cada formato grava o mesmo Render Result
+    start = time.perf_counter()
+    bpy.ops.render.render()
+    print(f"Render: {time.perf_counter() - start:.2f}s ({scene.render.resolution_x}x{scene.render.resolution_y} a {scene.render.resolution_percentage}%)")
+    pixels = read_render_pixels(scene) if args.writer else None
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for spec in args.codecs:
+            try:
+                results.append(benchmark_codec(scene, spec, args.repeat, output_dir, pixels))
+            except (RuntimeError, TypeError) as e:
+                # Versões antigas do Blender não têm WEBP
+                results.append({"codec": spec, "error": str(e)})
+            print(json.dumps(results[-1]))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
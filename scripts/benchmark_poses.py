@@ -0,0 +1,143 @@
+import sys
+import math
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from poseState import PoseState
+
+# Mede a geração de poses do PoseState (variações + matrizes) sem o Blender, com a mesma sequência de
+# variações de apply_object_variations em main.py. Dentro do Blender, --objects também mede a gravação das poses
+# e a compara com o caminho antigo, que escrevia rotation_euler, location e scale componente a componente.
+# --check confere as matrizes (Euler XYZ, flip e articulação) com uma referência montada eixo a eixo.
+# Uso: python benchmark_poses.py --frames 100000 --objects-per-group 2
+#      python benchmark_poses.py --check
+#      blender -b cena.blend -P benchmark_poses.py -- --objects Mosquito.001 Mosquito.002 --frames 10000
+
+def pose_frame(pose, rng, frame_index):
+    pose.reset()
+    pose.hinge(30 + 15 * (frame_index % 4))
+    if frame_index % 2:
+        pose.flip()
+    pose.random_move((-0.1, 0.1), (-0.1, 0.1), rng)
+    pose.rotate(30 * (frame_index % 4), axis='z')
+
+# Mesma sequência de pose_frame com as escritas por componente do ObjectManager antigo
+def legacy_pose_frame(objects, rng, frame_index):
+    for obj in objects:
+        obj.rotation_euler = (0, 0, 0)
+        obj.location = (0, 0, 0)
+        obj.scale = (1, 1, 1)
+    if len(objects) == 2:
+        objects[0].rotation_euler.z = objects[1].rotation_euler.z - math.radians(30 + 15 * (frame_index % 4))
+    if frame_index % 2:
+        for obj in objects:
+            obj.scale.z *= -1
+    initial = objects[0].location.copy()
+    x = rng.uniform(-0.1, 0.1) + initial.x
+    y = rng.uniform(-0.1, 0.1) + initial.y
+    for obj in objects:
+        obj.location.x = x
+        obj.location.y = y
+    angle = math.radians(30 * (frame_index % 4))
+    for obj in objects:
+        obj.rotation_euler.z += angle
+
+# Matriz de referência de um objeto: T @ Rz @ Ry @ Rx @ S, com cada rotação montada separadamente
+def reference_matrix(location, rotation, scale):
+    x, y, z = rotation
+    rx = np.array([[1, 0, 0], [0, math.cos(x), -math.sin(x)], [0, math.sin(x), math.cos(x)]])
+    ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rz = np.array([[math.cos(z), -math.sin(z), 0], [math.sin(z), math.cos(z), 0], [0, 0, 1]])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rz @ ry @ rx @ np.diag(scale)
+    matrix[:3, 3] = location
+    return matrix
+
+# Use this function to check PoseState against the reference (and against mathutils inside Blender);
+# returns the number of mismatches
+def check_poses(cases=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    try:
+        from mathutils import Euler, Matrix
+    except ImportError:
+        Matrix = None
+    failures = 0
+    for case in range(cases):
+        pose = PoseState(2)
+        pose.location[:] = rng.uniform(-1, 1, (2, 3))
+        pose.rotation[:] = rng.uniform(-math.pi, math.pi, (2, 3))
+        pose.scale[:] = rng.uniform(0.5, 2, (2, 3))
+        expected_scale = pose.scale.copy()
+        if case % 2:
+            pose.flip()
+            expected_scale[:, 2] *= -1
+        angle = float(rng.uniform(0, 90))
+        pose.hinge(angle)
+        # A articulação deixa o primeiro objeto angle graus atrás do segundo em z
+        failures += not math.isclose(pose.rotation[0, 2], pose.rotation[1, 2] - math.radians(angle), abs_tol=1e-12)
+        failures += pose.flipped != bool(case % 2)
+
+        for i, matrix in enumerate(pose.matrices()):
+            reference = reference_matrix(pose.location[i], pose.rotation[i], expected_scale[i])
+            failures += not np.allclose(matrix, reference, atol=1e-9)
+            if Matrix is not None:
+                blender = Matrix.LocRotScale(pose.location[i], Euler(pose.rotation[i], 'XYZ'), expected_scale[i])
+                failures += not np.allclose(matrix, np.array(blender), atol=1e-5)
+    return failures
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--objects-per-group", type=int, default=2)
+    parser.add_argument("--objects", nargs="+", default=None, help="Objetos da cena para medir também PoseState.apply e o caminho antigo (requer o Blender)")
+    parser.add_argument("--check", action="store_true", help="Confere as matrizes do PoseState com a referência e sai")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = check_poses()
+        print("Matrizes conferem com a referência." if failures == 0 else f"{failures} divergências nas matrizes.")
+        sys.exit(1 if failures else 0)
+
+    objects = None
+    if args.objects:
+        import bpy
+        objects = [bpy.data.objects[name] for name in args.objects]
+    pose = PoseState(len(objects) if objects else args.objects_per_group)
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    for frame_index in range(args.frames):
+        pose_frame(pose, rng, frame_index)
+    variations_time = (time.perf_counter() - start) / args.frames
+
+    start = time.perf_counter()
+    for frame_index in range(args.frames):
+        pose.matrices()
+    matrices_time = (time.perf_counter() - start) / args.frames
+
+    print(f"Objetos por grupo: {pose.count} | Frames: {args.frames}")
+    print(f"Variações: {variations_time * 1e6:.2f} us/frame")
+    print(f"Matrizes:  {matrices_time * 1e6:.2f} us/frame")
+    if objects:
+        # Frame completo nos dois caminhos: variações e gravação no Blender
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for frame_index in range(args.frames):
+            pose_frame(pose, rng, frame_index)
+            pose.apply(objects)
+        pose_time = (time.perf_counter() - start) / args.frames
+
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for frame_index in range(args.frames):
+            legacy_pose_frame(objects, rng, frame_index)
+        legacy_time = (time.perf_counter() - start) / args.frames
+
+        print(f"PoseState + matrix_basis:   {pose_time * 1e6:.2f} us/frame")
+        print(f"Escrita por componente:     {legacy_time * 1e6:.2f} us/frame ({legacy_time / pose_time:.1f}x)")
@@ -0,0 +1,61 @@
+import bpy
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from renderProfiles import RENDER_PROFILES, apply_render_profile
+
+# Mede segundos por frame de cada perfil de render na cena atual.
+# Uso: blender -b cena.blend -P benchmark_profiles.py -- --profiles draft train hero --frames 5
+
+def benchmark_profile(scene, profile, frames, output_dir):
+    apply_render_profile(scene, profile)
+    scene.render.filepath = os.path.join(output_dir, f"{profile}.png")
+
+    # O primeiro render inclui compilação de shaders e carregamento da cena, medido à parte
+    start = time.perf_counter()
+    bpy.ops.render.render(write_still=True)
+    warmup = time.perf_counter() - start
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        bpy.ops.render.render(write_still=True)
+        times.append(time.perf_counter() - start)
+
+    return {
+        "profile": profile,
+        "engine": scene.render.engine,
+        "warmup_s": round(warmup, 3),
+        "seconds_per_frame": round(sum(times) / len(times), 3),
+        "min_s": round(min(times), 3),
+        "max_s": round(max(times), 3),
+    }
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=["draft", "train", "hero"], choices=list(RENDER_PROFILES))
+    parser.add_argument("--frames", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Arquivo JSON com os resultados")
+    args = parser.parse_args(argv)
+
+    scene = bpy.context.scene
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for profile in args.profiles:
+            try:
+                results.append(benchmark_profile(scene, profile, args.frames, output_dir))
+            except (RuntimeError, ValueError) as e:
+                # Eevee/Workbench falham em nós sem contexto OpenGL
+                results.append({"profile": profile, "error": str(e)})
+            print(json.dumps(results[-1]))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
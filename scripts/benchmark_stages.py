@@ -0,0 +1,61 @@
+import bpy
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+import main
+from stageTimer import StageTimer
+from variationPlan import load_scenario
+
+# Executa um cenário pequeno e fixo com o laço de generate_scenario e reporta os percentis de cada etapa:
+# scene, pose, depsgraph_update, bbox_projection, render, image_write e annotation_write.
+# frames conta só os frames renderizados; os descartados (sem pose válida) aparecem em dropped_frames.
+# Uso: blender -b cena.blend -P benchmark_stages.py -- --profile draft --repeat 3 --output stages.json
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", default=str(Path(__file__).resolve().parent.parent / "scenarios" / "benchmark.json"))
+    parser.add_argument("--profile", default="draft", help="Perfil de render (ver renderProfiles.py)")
+    parser.add_argument("--repeat", type=int, default=1, help="Quantas vezes o cenário é gerado")
+    parser.add_argument("--output", default=None, help="Arquivo JSON com os resultados")
+    args = parser.parse_args(argv)
+
+    # Mesma preparação da cena feita por main.py
+    light_obj = bpy.data.objects.get("Light")
+    main.scene_manager = main.sceneManager(
+        bpy.data.objects.get("Camera"),
+        bpy.data.objects.get("Plane"),
+        [light_obj] if light_obj else [],
+        plane_materials=["Fabric-03"]
+    )
+    main.scene_manager.setup_scene()
+    main.scene_manager.apply_render_profile(args.profile)
+
+    scenario = load_scenario(args.scenario)
+    timer = StageTimer()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        # Pasta nova a cada repetição para que o manifesto não pule os frames
+        with tempfile.TemporaryDirectory() as output_dir:
+            main.generate_scenario(scenario, output_dir, timer=timer)
+    wall_time = time.perf_counter() - start
+    rendered_frames = len(timer.samples.get("render", []))
+
+    report = {
+        "scenario": os.path.basename(args.scenario),
+        "profile": args.profile,
+        "engine": bpy.context.scene.render.engine,
+        "frames": rendered_frames,
+        "dropped_frames": len(scenario) * args.repeat - rendered_frames,
+        "wall_time_s": round(wall_time, 3),
+        "stages": timer.summary(),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        timer.write_json(args.output, extra={key: value for key, value in report.items() if key != "stages"})
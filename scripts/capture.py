@@ -1,6 +1,6 @@
 import bpy
 import os
-import time
+import sys
 import math
 import bpy_extras
 from mathutils import Vector
@@ -8,9 +8,27 @@ from pathlib import Path
 import random
 import bpy_extras
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from animationBaker import AnimationBaker
+from runConfig import parse_run_args, redraw_viewport
+from renderProfiles import apply_render_profile
+from outputFormats import apply_output_format
+from telemetry import Telemetry
+from shardManager import ShardManager
+
+# blender -b cena.blend -P capture.py -- --output-dir /dados/capturas [--seed 42] [--animation] [--shard-index K --shard-count N]
+args = parse_run_args(sys.argv, description="Captura a trajetória da câmera ao redor do cilindro.")
+if args.scenario is not None:
+    raise SystemExit("capture.py não usa cenários (--scenario); as variações da trajetória estão no script.")
+if args.seed is not None:
+    random.seed(args.seed)
+# Cada subframe tem o seu gerador aleatório, então qualquer shard pode renderizá-lo com o mesmo resultado
+seed = args.seed if args.seed is not None else 42
+shard_manager = ShardManager(args.shard_index, args.shard_count)
+
 # Número de frames e caminho para salvar as imagens
 num_frames = 1
-base_path = "/home/jedl/Downloads/Capturas_Blender"
+base_path = args.output_dir if args.output_dir is not None else "Capturas_Blender"
 
 # Cria a pasta base, se não existir
 if not os.path.exists(base_path):
@@ -145,18 +163,22 @@ def ensure_track_to(obj, target):
     track_to.track_axis = 'TRACK_NEGATIVE_Z'
     track_to.up_axis = 'UP_Y'
 
-def randomly_move_object_xy(obj_to_change, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3)):
+def randomly_move_object_xy(obj_to_change, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3), rng=None):
     """Randomly moves an object within the XY plane"""
+    if rng is None:
+        rng = random
     obj_to_change.location = Vector((0.0, 0.0, 0.0))
-    obj_to_change.location.x = random.uniform(*x_range)
-    obj_to_change.location.y = random.uniform(*y_range)
+    obj_to_change.location.x = rng.uniform(*x_range)
+    obj_to_change.location.y = rng.uniform(*y_range)
 
 def render_trajectory(
     circle_obj, 
     prefix, 
     do_lens_variation=False, 
     do_cylinder_rotation=False,
-    do_light_variation=False
+    do_light_variation=False,
+    animation=False,
+    first_index=0
 ):
     """
     Renderiza a trajetória da câmera presa ao círculo para diferentes frames.
@@ -165,6 +187,10 @@ def render_trajectory(
       - do_lens_variation: Se True, variação de valores de lente.
       - do_cylinder_rotation: Se True, rotaciona o objeto (eixo Z).
       - do_light_variation: Se True, variação na posição e temperatura da luz.
+      - animation: Se True, grava cada subframe como keyframe e renderiza tudo com uma
+        única chamada render(animation=True); as anotações são geradas durante a gravação.
+      - first_index: índice global do primeiro subframe desta trajetória; com --shard-count N,
+        este processo só renderiza os subframes cujo índice global pertence ao seu shard.
     """
     camera.parent = circle_obj
     ensure_track_to(camera, circle_obj)
@@ -196,7 +222,9 @@ def render_trajectory(
         * len(possible_temps)
     )
     subframe_count = 0
-    start_time = time.time()
+    baked_frames = []
+    baker = AnimationBaker() if animation else None
+    telemetry.start_dataset(prefix, len(shard_manager.frame_indices_between(first_index, first_index + total_subframes)))
 
     for frame_idx in range(num_frames):
        
@@ -213,34 +241,44 @@ def render_trajectory(
                     light.location = pos
 
                     for temp in possible_temps:
+                        # Subframes de outros shards só avançam a contagem
+                        if not shard_manager.owns(first_index + subframe_count):
+                            subframe_count += 1
+                            continue
+
                         if temp in temp_colors:
                             light.data.color = temp_colors[temp]
                         
-                        bpy.context.view_layer.update()
-                        
-                        randomly_move_object_xy(cylinder_obj)
+                        randomly_move_object_xy(cylinder_obj, rng=shard_manager.frame_random(seed, first_index + subframe_count))
                         
+                        # Uma atualização por subframe basta para a anotação; sem interface não há redesenho
                         bpy.context.view_layer.update()
-                        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+                        redraw_viewport()
 
                        
-                        file_name = f"{prefix}_{subframe_count:04d}.png"
+                        file_name = f"{prefix}_{subframe_count:04d}{bpy.context.scene.render.file_extension}"
                         file_path = os.path.join(base_path, file_name)
+
+                        if baker is not None:
+                            # Anotação e keyframes vêm da mesma pose
+                            write_annotations("Cylinder", file_path, annotations_dir)
+                            baker.key(circle_obj, ("rotation_euler",), subframe_count)
+                            baker.key(cylinder_obj, ("location", "rotation_euler"), subframe_count)
+                            baker.key(camera.data, ("lens",), subframe_count)
+                            baker.key(light, ("location",), subframe_count)
+                            baker.key(light.data, ("color",), subframe_count)
+                            baked_frames.append(subframe_count)
+                            subframe_count += 1
+                            continue
+
                         bpy.context.scene.render.filepath = file_path
 
                         # Renderiza a imagem
-                        frame_start_time = time.time()
                         bpy.ops.render.render(write_still=True)
-                        frame_end_time = time.time()
 
                         # Salva a anotação YOLO na pasta separada
                         write_annotations("Cylinder", file_path, annotations_dir)
 
-                        subframe_count += 1
-                        elapsed_time = frame_end_time - start_time
-                        time_per_subframe = frame_end_time - frame_start_time
-                        remaining_time = (total_subframes - subframe_count) * time_per_subframe
-
                         print(
                             f"{prefix} - Frame {frame_idx + 1}/{num_frames} | "
                             f"Lens={lens}mm | "
@@ -249,30 +287,46 @@ def render_trajectory(
                             f"Temp={temp}K | "
                             f"CircAngle={math.degrees(angle):.2f}°"
                         )
-                        print(
-                            f"Tempo subframe: {time_per_subframe:.2f}s | "
-                            f"Decorrido: {elapsed_time:.2f}s | "
-                            f"Restante: {remaining_time:.2f}s"
-                        )
+                        # Taxa suavizada e ETA do dataset e da captura inteira
+                        telemetry.frame_done(subframe_count)
+                        subframe_count += 1
                         
+    if baker is not None:
+        baker.render(baked_frames, os.path.join(base_path, f"{prefix}_"))
+        baker.clear()
+        telemetry.batch_done(baked_frames)
+
     circle_obj.rotation_euler[0] = 0
     cylinder_obj.rotation_euler[2] = 0
     cylinder_obj.location = (0, -0.53363, 0.1)
     bpy.context.view_layer.update()
-    bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+    redraw_viewport()
     print(f"Captura da trajetória '{prefix}' concluída!")
 
-# Configurações de renderização
-bpy.context.scene.render.engine = 'BLENDER_EEVEE_NEXT'
-bpy.context.scene.render.image_settings.file_format = 'PNG'
+# Configurações de renderização (--profile draft/train/hero usa Cycles na CPU)
+if args.profile is not None:
+    apply_render_profile(bpy.context.scene, args.profile)
+else:
+    bpy.context.scene.render.engine = 'BLENDER_EEVEE_NEXT'
+apply_output_format(bpy.context.scene, args.image_format)
 
 
+# Duas trajetórias com todas as variações: 3 lentes x 24 ângulos x posições x temperaturas da luz
+subframes_per_trajectory = num_frames * 3 * 24 * len(light_positions) * len(temp_colors)
+telemetry = Telemetry(
+    len(shard_manager.frame_indices(2 * subframes_per_trajectory)),
+    directory=args.telemetry_dir if args.telemetry_dir is not None else base_path,
+    shard_index=shard_manager.shard_index
+)
+
 plane.data.materials.clear()
 plane.data.materials.append(fabric_03)
 # Chamada da função principal (exemplo: variação apenas na luz)
-render_trajectory(circle, "Cylinder", True, True, True)
+render_trajectory(circle, "Cylinder", True, True, True, animation=args.animation)
 
 plane.data.materials.clear()
 plane.data.materials.append(fabric_04)
 
-render_trajectory(circle, "Cylinder1", True, True, True)
\ No newline at end of file
+render_trajectory(circle, "Cylinder1", True, True, True, animation=args.animation, first_index=subframes_per_trajectory)
+
+telemetry.finish()
@@ -0,0 +1,126 @@
+import os
+import random
+import unicodedata
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from label_index import LabelReader, LABEL_MISSING, LABEL_MALFORMED, find_images
+
+# Folhas de contato para revisar datasets renderizados sem interface (nós de render sem display):
+# as imagens são decodificadas em paralelo, recebem as caixas YOLO e o id da classe, e são montadas em mosaicos.
+# Uso: python contact_sheet.py /dados/instruments --output qa --every 50
+#      python contact_sheet.py /dados/instruments --output qa --random 500 --seed 1
+#      python contact_sheet.py /dados/instruments --output qa --flagged
+
+COLORS = [(0, 255, 0), (255, 128, 0), (0, 128, 255), (255, 0, 255), (0, 255, 255), (128, 0, 255)]
+
+# Use this function to read the label of an image (from the label index when it was built, see label_index.py);
+# returns the boxes and the problems found (empty when the label is fine)
+def read_label(image_path, reader, min_area=0.0):
+    labels, status = reader.read(image_path)
+    if status == LABEL_MISSING:
+        return [], ["sem anotação"]
+    flags = ["linha inválida"] if status == LABEL_MALFORMED else []
+    class_ids, x_center, y_center, width, height = labels.T
+    if np.any((x_center - width / 2 < 0) | (x_center + width / 2 > 1) | (y_center - height / 2 < 0) | (y_center + height / 2 > 1)):
+        flags.append("fora da imagem")
+    if np.any(width * height < min_area):
+        flags.append("caixa pequena")
+    if len(labels) == 0:
+        flags.append("sem caixas")
+    boxes = [(int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4])) for row in labels]
+    return boxes, flags
+
+# Use this function to choose the images to review: every Nth, a random sample, or only the flagged ones
+def sample_images(image_paths, reader, every=None, count=None, seed=0, flagged=False, min_area=0.0):
+    if every:
+        image_paths = image_paths[::every]
+    if flagged:
+        image_paths = [path for path in image_paths if read_label(path, reader, min_area)[1]]
+    if count is not None and count < len(image_paths):
+        image_paths = sorted(random.Random(seed).sample(image_paths, count))
+    return image_paths
+
+# Decodifica, reduz para o tamanho do quadro e desenha as caixas já na escala reduzida
+def render_tile(image_path, reader, tile_size, min_area=0.0):
+    tile = np.zeros((tile_size, tile_size, 3), dtype=np.uint8)
+    image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if image is None:
+        cv2.putText(tile, "erro ao ler", (8, tile_size // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        return tile
+
+    h, w = image.shape[:2]
+    scale = tile_size / max(h, w)
+    new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+    left, top = (tile_size - new_w) // 2, (tile_size - new_h) // 2
+    tile[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+    boxes, flags = read_label(image_path, reader, min_area)
+    for class_id, x_center, y_center, width, height in boxes:
+        x1 = int(left + (x_center - width / 2) * new_w)
+        y1 = int(top + (y_center - height / 2) * new_h)
+        x2 = int(left + (x_center + width / 2) * new_w)
+        y2 = int(top + (y_center + height / 2) * new_h)
+        color = COLORS[class_id % len(COLORS)]
+        cv2.rectangle(tile, (x1, y1), (x2, y2), color, 1)
+        cv2.putText(tile, str(class_id), (x1 + 2, max(10, y1 - 3)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+
+    # Nome do arquivo e problemas da anotação no rodapé do quadro
+    caption = os.path.basename(image_path) + (f" [{', '.join(sorted(set(flags)))}]" if flags else "")
+    # As fontes do cv2 só desenham ASCII
+    caption = unicodedata.normalize("NFKD", caption).encode("ascii", "ignore").decode()
+    cv2.rectangle(tile, (0, tile_size - 14), (tile_size, tile_size), (0, 0, 0), -1)
+    cv2.putText(tile, caption, (3, tile_size - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.33, (0, 0, 255) if flags else (255, 255, 255), 1)
+    return tile
+
+def build_sheet(tiles, columns, tile_size):
+    rows = (len(tiles) + columns - 1) // columns
+    sheet = np.zeros((rows * tile_size, columns * tile_size, 3), dtype=np.uint8)
+    for position, tile in enumerate(tiles):
+        row, column = divmod(position, columns)
+        sheet[row * tile_size:(row + 1) * tile_size, column * tile_size:(column + 1) * tile_size] = tile
+    return sheet
+
+# Use this function to write the contact sheets of the chosen images; returns the written paths
+def write_contact_sheets(image_paths, reader, output_dir, columns=8, rows=6, tile_size=256, workers=None, min_area=0.0, quality=90):
+    os.makedirs(output_dir, exist_ok=True)
+    per_sheet = columns * rows
+    sheet_paths = []
+    # cv2.imread e cv2.resize liberam o GIL, então threads decodificam em paralelo
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(image_paths), per_sheet):
+            batch = image_paths[start:start + per_sheet]
+            tiles = list(executor.map(lambda path: render_tile(path, reader, tile_size, min_area), batch))
+            sheet_path = os.path.join(output_dir, f"sheet_{start // per_sheet:04d}.jpg")
+            cv2.imwrite(sheet_path, build_sheet(tiles, columns, tile_size), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            sheet_paths.append(sheet_path)
+
+    # Lista de quais imagens estão em cada folha, para achar o arquivo original
+    with open(os.path.join(output_dir, "sheets.txt"), "w") as f:
+        for position, image_path in enumerate(image_paths):
+            f.write(f"sheet_{position // per_sheet:04d}.jpg\t{position % per_sheet}\t{image_path}\n")
+    return sheet_paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", help="Pasta com as imagens (busca recursiva)")
+    parser.add_argument("--output", default="contact_sheets")
+    parser.add_argument("--every", type=int, default=None, help="Usa uma a cada N imagens")
+    parser.add_argument("--random", type=int, default=None, help="Amostra aleatória de N imagens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--flagged", action="store_true", help="Só imagens sem anotação, com caixas fora da imagem ou pequenas")
+    parser.add_argument("--min-area", type=float, default=0.0005, help="Área normalizada abaixo da qual a caixa é sinalizada")
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--tile", type=int, default=256, help="Tamanho de cada quadro em pixels")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--index", default=None, help="Pasta do índice das anotações (padrão: <pasta>/.label_index, se existir)")
+    args = parser.parse_args()
+
+    image_paths = find_images(args.folder)
+    reader = LabelReader.for_folder(args.folder, args.index)
+    selected = sample_images(image_paths, reader, args.every, args.random, args.seed, args.flagged, args.min_area)
+    sheet_paths = write_contact_sheets(selected, reader, args.output, args.columns, args.rows, args.tile, args.workers, args.min_area)
+    print(f"{len(image_paths)} imagens, {len(selected)} selecionadas: {len(sheet_paths)} folhas em {args.output}")
@@ -1,17 +1,12 @@
 import cv2
 import os
 import glob
+from label_index import LabelReader, LABEL_MISSING
 
-def draw_bounding_box(image, bbox_file):
-    with open(bbox_file, "r") as f:
-        lines = f.readlines()
-    
+# boxes: (n, 5) YOLO rows (class, x_center, y_center, width, height), as returned by LabelReader.read
+def draw_bounding_box(image, boxes):
     h, w = image.shape[:2]
-    for line in lines:
-        parts = line.strip().split()
-        if len(parts) != 5:
-            continue
-        _, x_center, y_center, bbox_width, bbox_height = map(float, parts)
+    for _, x_center, y_center, bbox_width, bbox_height in boxes:
         
         x1 = int((x_center - bbox_width / 2) * w)
         y1 = int((y_center - bbox_height / 2) * h)
@@ -28,9 +23,11 @@ def process_images(folder_path):
     for ext in image_extensions:
         image_paths.extend(glob.glob(os.path.join(folder_path, '**', ext), recursive=True))
     
+    # Lê as anotações pelo índice de label_index.py, se ele foi criado; senão, pelos .txt
+    reader = LabelReader.for_folder(folder_path)
     for image_path in image_paths:
-        txt_path = os.path.splitext(image_path)[0] + ".txt"
-        if not os.path.exists(txt_path):
+        boxes, status = reader.read(image_path)
+        if status == LABEL_MISSING:
             print(f"Sem bounding box para: {image_path}")
             continue
         
@@ -39,7 +36,7 @@ def process_images(folder_path):
             print(f"Erro ao carregar imagem: {image_path}")
             continue
         
-        img_with_bbox = draw_bounding_box(img, txt_path)
+        img_with_bbox = draw_bounding_box(img, boxes)
         
         cv2.imshow("Bounding Box", img_with_bbox)
         key = cv2.waitKey(0) & 0xFF
@@ -1,64 +1,197 @@
 import os
+import json
 import shutil
-import random
+import hashlib
+import argparse
 import yaml
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Modos de colocar os arquivos no dataset: copy copia; hardlink, reflink e symlink não duplicam os bytes
+# e voltam para a cópia quando o sistema de arquivos não suporta o link (outro disco, FAT, ...)
+LINK_MODES = ("copy", "hardlink", "reflink", "symlink")
+
+# ioctl FICLONE do Linux: cópia copy-on-write em btrfs, xfs e similares
+FICLONE = 0x40049409
+
+def reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+
+def link_file(src, dst, mode):
+    if mode == "hardlink":
+        os.link(src, dst)
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+    else:
+        reflink(src, dst)
+
+# Use this function to place src at dst with the given mode; returns the mode actually used.
+# Once a link fails, state["mode"] falls back to copy for the remaining files
+def place_file(src, dst, state):
+    # O destino é removido antes: substitui arquivos antigos como o shutil.copy, e uma cópia sobre um link
+    # de uma execução anterior (que aponta para a própria origem) não falha com SameFileError
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    mode = state["mode"]
+    if mode != "copy":
+        try:
+            link_file(src, dst, mode)
+            return mode
+        except OSError as e:
+            if state["mode"] != "copy":
+                print(f"Não foi possível usar {mode} ({e}); copiando os arquivos.")
+                state["mode"] = "copy"
+            if os.path.lexists(dst):
+                os.unlink(dst)
+    shutil.copyfile(src, dst)
+    return "copy"
+
+# Índice dos arquivos já colocados no dataset, gravado na pasta de saída
+INDEX_FILE = "format_index.json"
+
+# Extensões das imagens geradas (--image-format png, jpeg ou webp)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# Use this function to get the name of a source file in the dataset: readable (pasta_nome) and made unique by a short
+# hash of the identity, since "a_b/c.png" and "a/b_c.png" would otherwise both become "a_b_c"
+def dataset_name(subfolder, stem, identity):
+    return f"{subfolder}_{stem}_{hashlib.sha1(identity.encode('utf-8')).hexdigest()[:8]}"
+
+# Use this function to get the split of a source file: the same identity always goes to the same split,
+# independently of the other files
+def stable_split(identity, split_ratio):
+    digest = hashlib.sha1(identity.encode("utf-8")).digest()
+    return "train" if int.from_bytes(digest[:8], "big") / 2 ** 64 < split_ratio else "test"
+
+def load_index(index_path):
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"files": {}}
+
+# Grava o índice em um arquivo temporário e renomeia, para que uma execução interrompida não o corrompa
+def save_index(index_path, index):
+    temporary_path = index_path + ".tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(index, f)
+    os.replace(temporary_path, index_path)
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+# Remove os arquivos de images/{train,test} e labels/{train,test}; retorna quantos foram removidos
+def clear_split_folders(output_folder):
+    paths = [
+        entry.path
+        for folder in ("images/train", "images/test", "labels/train", "labels/test")
+        for entry in os.scandir(os.path.join(output_folder, folder))
+        if not entry.is_dir(follow_symlinks=False)
+    ]
+    remove_files(paths)
+    return len(paths)
+
+# Re-executar só coloca arquivos novos ou alterados (tamanho ou data de modificação), de acordo com o índice
+def process_folder(input_folder, output_folder, split_ratio=0.8, mode="copy", workers=8):
+    if mode not in LINK_MODES:
+        raise ValueError(f"Modo '{mode}' desconhecido. Opções: {', '.join(LINK_MODES)}")
 
-def process_folder(input_folder, output_folder, split_ratio=0.8):
     # Cria as pastas de destino
     os.makedirs(os.path.join(output_folder, 'images/train'), exist_ok=True)
     os.makedirs(os.path.join(output_folder, 'images/test'), exist_ok=True)
     os.makedirs(os.path.join(output_folder, 'labels/train'), exist_ok=True)
     os.makedirs(os.path.join(output_folder, 'labels/test'), exist_ok=True)
 
-    # Lista todas as subpastas
-    all_images = []
-    all_labels = []
-    
-    # Armazena o número único de cada arquivo de imagem
-    img_id = 0
-    
-    for subfolder in os.listdir(input_folder):
+    # Arquivos já colocados em execuções anteriores (ver load_index)
+    index_path = os.path.join(output_folder, INDEX_FILE)
+    if not os.path.exists(index_path):
+        # Sem índice não há como saber o que versões anteriores (nomes e divisão aleatória) deixaram na saída:
+        # as pastas são esvaziadas para que nenhuma imagem apareça duas vezes, às vezes em treino e em teste
+        cleared = clear_split_folders(output_folder)
+        if cleared:
+            print(f"Sem {INDEX_FILE} em {output_folder}: {cleared} arquivos antigos removidos.")
+    index = load_index(index_path)
+    placed = index["files"]
+
+    # Cada pasta é listada uma única vez; o stat de cada arquivo vem da própria listagem
+    sources = {}
+    with os.scandir(input_folder) as subfolders:
+        subfolder_entries = list(subfolders)
+    for subfolder_entry in subfolder_entries:
+        subfolder = subfolder_entry.name
         subfolder_path = os.path.join(input_folder, subfolder)
-        if os.path.isdir(subfolder_path):
-            for file in os.listdir(subfolder_path):
-                if file.endswith('.png'):
-                    img_path = os.path.join(subfolder_path, file)
-                    label_path = os.path.splitext(img_path)[0] + '.txt'
-
-                    if os.path.exists(label_path):
-                        # Cria os novos nomes para as imagens e labels
-                        img_new_name = f"{subfolder}_{img_id}.png"
-                        label_new_name = f"{subfolder}_{img_id}.txt"
-                        
-                        # Adiciona os caminhos de destino para as imagens e anotações
-                        all_images.append((img_path, img_new_name))
-                        all_labels.append((label_path, label_new_name))
-
-                        # Incrementa o id único
-                        img_id += 1
-
-    # Embaralha as imagens para dividir em treino/validação
-    data = list(zip(all_images, all_labels))
-    random.shuffle(data)
-
-    # Divide em treino e validação
-    train_data = data[:int(len(data) * split_ratio)]
-    val_data = data[int(len(data) * split_ratio):]
-
-    # Função para mover as imagens e labels
-    def move_files(data, data_type):
-        for (img_path, img_new_name), (label_path, label_new_name) in data:
-            # Define os caminhos de destino
-            img_dest = os.path.join(output_folder, f'images/{data_type}', img_new_name)
-            label_dest = os.path.join(output_folder, f'labels/{data_type}', label_new_name)
-
-            # Copia as imagens e anotações para os diretórios de destino
-            shutil.copy(img_path, img_dest)
-            shutil.copy(label_path, label_dest)
-
-    # Move os arquivos para a estrutura de pastas
-    move_files(train_data, 'train')
-    move_files(val_data, 'test')
+        if subfolder_entry.is_dir():
+            with os.scandir(subfolder_path) as entries:
+                files = {entry.name: entry for entry in entries}
+            for file, entry in files.items():
+                stem, extension = os.path.splitext(file)
+                if extension.lower() in IMAGE_EXTENSIONS:
+                    label_entry = files.get(stem + '.txt')
+
+                    if label_entry is not None:
+                        # O nome no dataset e a divisão dependem só da identidade do arquivo (pasta/nome)
+                        identity = f"{subfolder}/{file}"
+                        img_stat = entry.stat()
+                        label_stat = label_entry.stat()
+                        sources[identity] = {
+                            "image": entry.path,
+                            "label": label_entry.path,
+                            "name": dataset_name(subfolder, stem, identity),
+                            "extension": extension.lower(),
+                            "split": stable_split(identity, split_ratio),
+                            "signature": [img_stat.st_size, img_stat.st_mtime_ns, label_stat.st_size, label_stat.st_mtime_ns],
+                        }
+
+    # Função para montar os destinos das imagens e labels
+    def destinations(name, data_type, extension=".png"):
+        img_dest = os.path.join(output_folder, f'images/{data_type}', f"{name}{extension}")
+        label_dest = os.path.join(output_folder, f'labels/{data_type}', f"{name}.txt")
+        return img_dest, label_dest
+
+    # Só arquivos novos ou alterados são colocados; arquivos que saíram da origem
+    # (ou mudaram de divisão com outro split_ratio) são removidos do dataset
+    jobs = []
+    unchanged = 0
+    for identity, source in sources.items():
+        previous = placed.get(identity)
+        placed_as = None if previous is None else (previous["name"], previous["split"], previous.get("extension", ".png"))
+        target = (source["name"], source["split"], source["extension"])
+        if placed_as == target and previous["signature"] == source["signature"]:
+            unchanged += 1
+            continue
+        # Índices de versões anteriores têm outros nomes: os arquivos antigos são removidos antes de colocar os novos
+        if placed_as is not None and placed_as != target:
+            remove_files(destinations(*placed_as))
+        img_dest, label_dest = destinations(*target)
+        jobs.append((source["image"], img_dest))
+        jobs.append((source["label"], label_dest))
+
+    removed = [identity for identity in placed if identity not in sources]
+    for identity in removed:
+        remove_files(destinations(placed[identity]["name"], placed[identity]["split"], placed[identity].get("extension", ".png")))
+
+    # Copia (ou liga) as imagens e anotações em paralelo; a cópia passa a maior parte do tempo esperando o disco
+    state = {"mode": mode}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        used = Counter(executor.map(lambda job: place_file(job[0], job[1], state), jobs))
+
+    index["files"] = {
+        identity: {"name": source["name"], "split": source["split"], "extension": source["extension"], "signature": source["signature"]}
+        for identity, source in sources.items()
+    }
+    save_index(index_path, index)
+
+    train_count = sum(1 for source in sources.values() if source["split"] == "train")
+    print(
+        f"{train_count} treino, {len(sources) - train_count} teste | {len(jobs) // 2} novos ou alterados, "
+        f"{unchanged} sem mudança, {len(removed)} removidos | " + (", ".join(f"{count} {name}" for name, count in used.items()) or "nada a copiar")
+    )
 
     # Cria o arquivo YAML
     create_yaml(output_folder)
@@ -81,7 +214,12 @@ def create_yaml(output_folder):
     with open(os.path.join(output_folder, 'dataset.yaml'), 'w') as f:
         yaml.dump(dataset_yaml, f, default_flow_style=False)
 
-# Exemplo de uso
-input_folder = './'
-output_folder = '../formatted_dataset'
-process_folder(input_folder, output_folder)
+# Exemplo de uso: python format_dataset.py --mode hardlink --workers 16
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="./")
+    parser.add_argument("--output", default="../formatted_dataset")
+    parser.add_argument("--mode", default="copy", choices=LINK_MODES)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    process_folder(args.input, args.output, mode=args.mode, workers=args.workers)
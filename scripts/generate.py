@@ -1,29 +1,74 @@
 import bpy
 import bpy_extras
 import os
+import sys
 import time
 import math
 import random
 from mathutils import Vector
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "datasetGenerator"))
+from shardManager import ShardManager
+from variationPlan import VariationPlan, load_scenario
+from renderManifest import RenderManifest, run_params
+from bboxProjector import BoundingBoxProjector, is_box_accepted
+from animationBaker import AnimationBaker
+from runConfig import parse_run_args, resolve_output_dir, resolve_output_format, resolve_letterbox, redraw_viewport
+from renderProfiles import apply_render_profile
+from outputFormats import apply_output_format
+from telemetry import Telemetry
+from imageWriter import AsyncImageWriter, prepare_viewer, read_render_pixels, encode_settings, save_blender_color, write_frame
+
 class DatasetGenerator:
-    def __init__(self, object=None, plane_materials=[]):
+    def __init__(self, object=None, plane_materials=[], shard_manager=None, seed=42, animation=False, profile=None, write_workers=0, image_format="png", letterbox=None):
         self.plane_materials = plane_materials
         self.obj = object
         self.num_frames = 1
 
+        # Divide as imagens entre vários processos do Blender (ver ShardManager)
+        self.shard_manager = shard_manager if shard_manager is not None else ShardManager()
+        self.seed = seed
+
+        # Grava o plano em keyframes e renderiza com uma única chamada render(animation=True)
+        self.animation = animation
+
+        # Telemetria compartilhada entre os datasets; sem ela cada render_plan cria a sua
+        self.telemetry = None
+
+        # Threads que codificam e gravam o PNG enquanto o próximo frame renderiza (0 = render(write_still=True))
+        self.writer = AsyncImageWriter(write_workers) if write_workers > 0 else None
+
+        # Projeção das bounding boxes com NumPy (vectorized=False usa world_to_camera_view por canto)
+        self.vectorized = True
+        self.projector = BoundingBoxProjector(bpy.context.scene)
+
         self.camera = bpy.data.objects["Camera"]
         self.circle = bpy.data.objects["Circle"]
         self.plane = bpy.data.objects["Plane"]
         
-        # Configura o render
-        bpy.context.scene.render.engine = 'BLENDER_EEVEE_NEXT'
-        bpy.context.scene.render.image_settings.file_format = 'PNG'
+        # Configura o render (sem perfil mantém o Eevee usado até aqui)
+        if profile is not None:
+            self.apply_render_profile(profile)
+        else:
+            bpy.context.scene.render.engine = 'BLENDER_EEVEE_NEXT'
+        # Formato e compressão das imagens (ver outputFormats.py)
+        apply_output_format(bpy.context.scene, image_format)
+
+        # Renderiza no tamanho de treino; as bordas do letterbox são adicionadas aos pixels antes de gravar
+        self.letterbox = letterbox
+        if letterbox is not None:
+            if animation and letterbox.pads:
+                raise ValueError("O letterbox com bordas não funciona com render(animation=True); remova --letterbox ou use --no-letterbox.")
+            letterbox.configure_scene(bpy.context.scene)
 
         # Configura o cenário
         self.setup_scene()
 
+    # Use this function to switch engine, samples, denoiser, bounces and resolution (ver renderProfiles.py)
+    def apply_render_profile(self, profile):
+        return apply_render_profile(bpy.context.scene, profile)
+
     def setup_scene(self):
         # Configura a câmera
         self.camera.data.lens = 35
@@ -89,10 +134,12 @@ class DatasetGenerator:
         light_obj.data.color = color
         return light_obj
     
-    def randomly_move_object_xy(self, obj_to_change, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3)):
+    def randomly_move_object_xy(self, obj_to_change, x_range=(-0.3, 0.3), y_range=(-0.3, 0.3), rng=None):
+        if rng is None:
+            rng = random
         obj_to_change.location = Vector((0.0, 0.0, 0.0))
-        obj_to_change.location.x = random.uniform(*x_range)
-        obj_to_change.location.y = random.uniform(*y_range)
+        obj_to_change.location.x = rng.uniform(*x_range)
+        obj_to_change.location.y = rng.uniform(*y_range)
     
     def replace_material(self, obj, obj_data, mat_src, mat_dst):
         for i in range(len(obj_data.materials)):
@@ -110,7 +157,9 @@ class DatasetGenerator:
         track_to.up_axis = 'UP_Y'
     
     def get_bounding_box(self, obj):
-        obj = obj
+        if self.vectorized:
+            return self.projector.get_bounding_box([obj])
+
         scene = bpy.context.scene
         cam = scene.camera
 
@@ -133,10 +182,20 @@ class DatasetGenerator:
 
         return (min_x, min_y, max_x, max_y)
 
-    def write_annotations(self, obj, image_path, annotations_folder, class_id=0):
-    
+    def write_annotations(self, obj, image_path, annotations_folder, class_id=0, bbox=None):
+        annotation_line = self.annotation_line(obj, class_id, bbox)
+        if annotation_line is None:
+            return
+        annotation_file = annotations_folder / f"{Path(image_path).stem}.txt"
+        with open(annotation_file, "w") as f:
+            f.write(annotation_line)
+
+    # Use this function to get the YOLO annotation text of the object, or None if it is out of the image
+    def annotation_line(self, obj, class_id=0, bbox=None):
         scene = bpy.context.scene
-        min_x, min_y, max_x, max_y = self.get_bounding_box(obj)
+        if bbox is None:
+            bbox = self.get_bounding_box(obj)
+        min_x, min_y, max_x, max_y = bbox
         
         x_center = (min_x + max_x) / 2
         y_center = scene.render.resolution_y - (min_y + max_y) / 2
@@ -150,15 +209,71 @@ class DatasetGenerator:
         
         if x_center < 0 or x_center > 1 or y_center < 0 or y_center > 1:
             print(f"Objeto fora dos limites, anotação não gerada.")
-            return
-        
-        annotation_line = f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
-        annotation_file = annotations_folder / f"{Path(image_path).stem}.txt"
-        with open(annotation_file, "w") as f:
-            f.write(annotation_line)
+            return None
+
+        # Coordenadas da imagem de treino, com as bordas do letterbox
+        if self.letterbox is not None:
+            x_center, y_center = self.letterbox.to_training_frame(x_center * scene.render.resolution_x, y_center * scene.render.resolution_y)
+            x_center /= self.letterbox.width
+            y_center /= self.letterbox.height
+            width *= scene.render.resolution_x / self.letterbox.width
+            height *= scene.render.resolution_y / self.letterbox.height
+
+        return f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n"
     
-    def render(self, prefix, base_path="/home/julia/Downloads/Capturas_Blender", lens_values=[], cylinder_angles=[], temp_colors={}, light_positions=[], random_moves=False, cable_materials=[]):
-        base_path = base_path
+    def render(self, prefix, base_path="Capturas_Blender", lens_values=[], cylinder_angles=[], temp_colors={}, light_positions=[], random_moves=False, cable_materials=[]):
+        # Monta o plano equivalente aos laços lente > ângulo > posição da luz > temperatura
+        axes = [("lens", lens_values), ("angle", cylinder_angles)]
+        if light_positions:
+            axes.append(("light_position", light_positions))
+        if temp_colors:
+            axes.append(("temperature", list(temp_colors.keys())))
+
+        # Frames pares recebem o segundo material e frames ímpares o primeiro
+        cycles = []
+        if len(cable_materials) > 1:
+            cycles.append(("material", [cable_materials[1], cable_materials[0]]))
+
+        plan = VariationPlan(
+            prefix,
+            axes,
+            cycles,
+            tables={"temperature": temp_colors},
+            settings={"prefix": prefix, "base_path": base_path, "random_moves": random_moves}
+        )
+        self.render_plan(plan)
+
+    # Use this function to move the object and return its bounding box, or None if no accepted pose was found
+    def place_object(self, plan, subframe_count, random_moves):
+        scene = bpy.context.scene
+        min_visibility = plan.settings.get("min_visibility", 0.0)
+        # Sem movimento aleatório a pose é fixa, então só há uma tentativa
+        max_attempts = plan.settings.get("max_attempts", 10) if random_moves else 1
+        rng = self.shard_manager.frame_random(self.seed, subframe_count)
+
+        for _ in range(max_attempts):
+            if random_moves:
+                if self.camera.data.lens < 35:
+                    self.obj.location = (0, 0, 0)
+                    self.randomly_move_object_xy(self.obj, x_range=(-0.1, 0.1), y_range=(-0.1, 0.1), rng=rng)
+                else:
+                    self.randomly_move_object_xy(self.obj, rng=rng)
+            # Uma única atualização por tentativa, para que matrix_world reflita a pose
+            bpy.context.view_layer.update()
+
+            bbox = self.get_bounding_box(self.obj)
+            if is_box_accepted(bbox, scene.render.resolution_x, scene.render.resolution_y, min_visibility):
+                return bbox
+            self.telemetry.frame_rejected()
+        return None
+
+    # Use this function to render every frame of a VariationPlan owned by this shard
+    def render_plan(self, plan):
+        prefix = plan.settings.get("prefix", plan.name)
+        base_path = plan.settings["base_path"]
+        random_moves = plan.settings.get("random_moves", False)
+        temp_colors = plan.tables.get("temperature", {})
+        materials = plan.values("material")
         annotations_dir = Path(base_path) / "annotations"
 
         # Cria a pasta base, se não existir
@@ -173,328 +288,175 @@ class DatasetGenerator:
         self.camera.parent = self.circle
         self.ensure_track_to(self.camera, self.circle)
 
-        # Configura as posições da iluminação variável
-        if light_positions:
-            possible_positions = light_positions
-        else:
-            possible_positions = [self.light.location.copy()]
-        
-        # Configura as temp. da iluminação variável
-        if temp_colors:
-            possible_temps = list(temp_colors.keys())
-        else:
-            possible_temps = [6500]
-            temp_colors[6500] = (self.light.data.color[0], self.light.data.color[1], self.light.data.color[2])
-        
         # Garante que o objeto esteja na posição correta
         self.obj.location = (0, 0, 0)
         self.obj.rotation_euler = (0, math.radians(90), 0)
 
-        # Gera as imagens
-        subframe_count = 0
-        for lens in lens_values:
-            self.camera.data.lens = lens
-
-            for cyl_angle_deg in cylinder_angles:
-                self.obj.rotation_euler = (0, math.radians(90), math.radians(cyl_angle_deg))
-
-                for pos in possible_positions:
-                    self.light.location = pos
-
-                    for temp in possible_temps:
-                        if temp in temp_colors:
-                            self.light.data.color = temp_colors[temp]
-                        
-                        bpy.context.view_layer.update()
-                        
-                        if random_moves:
-                            if lens < 35:
-                                self.obj.location = (0, 0, 0)
-                                self.randomly_move_object_xy(self.obj, x_range=(-0.1, 0.1), y_range=(-0.1, 0.1))
-                            else:
-                                self.randomly_move_object_xy(self.obj)
-                        
-                        if subframe_count % 2 == 0 and len(cable_materials) > 1:
-                            self.replace_material(self.obj, self.obj.data, bpy.data.materials[cable_materials[0]], bpy.data.materials[cable_materials[1]])
-                        elif len(cable_materials) > 1:
-                            self.replace_material(self.obj, self.obj.data, bpy.data.materials[cable_materials[1]], bpy.data.materials[cable_materials[0]])
-                        
-                        bpy.context.view_layer.update()
-                        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-
-                        file_name = f"{prefix}_{subframe_count:04d}.png"
-                        file_path = os.path.join(base_path, file_name)
-                        bpy.context.scene.render.filepath = file_path
-
-                        # Renderiza a imagem
-                        bpy.ops.render.render(write_still=True)
-
-                        # Salva a anotação YOLO na pasta separada
-                        self.write_annotations(self.obj, file_path, annotations_dir)
-
-                        subframe_count += 1
-
+        # Frames já concluídos em uma execução anterior são pulados
+        manifest = RenderManifest(base_path, self.shard_manager.shard_index)
+        # Semente, formato e resolução também fazem parte dos parâmetros: com outros valores o frame é renderizado de novo
+        settings_params = run_params(bpy.context.scene, self.seed, self.letterbox)
+
+        frame_indices = self.shard_manager.frame_indices(len(plan))
+        own_telemetry = self.telemetry is None
+        if own_telemetry:
+            self.telemetry = Telemetry(len(frame_indices), shard_index=self.shard_manager.shard_index)
+        self.telemetry.start_dataset(plan.name, len(frame_indices))
+
+        # Modo animação: frames gravados como keyframes, agrupados pelo material do cabo
+        baker = AnimationBaker() if self.animation else None
+        baked = {}
+
+        # Frames entregues ao writer só entram no manifesto depois que os arquivos foram gravados
+        writer = self.writer if baker is None else None
+        padded = self.letterbox is not None and self.letterbox.pads
+        if writer is not None or padded:
+            prepare_viewer(bpy.context.scene)
+        written = {}
+
+        # Gera as imagens; eixos ausentes do plano mantêm o valor atual da cena
+        for subframe_count in frame_indices:
+            frame = plan[subframe_count]
+            params = {**frame, **settings_params}
+            if manifest.is_done(subframe_count, params):
+                self.telemetry.frame_skipped()
+                continue
+
+            if "lens" in frame:
+                self.camera.data.lens = frame["lens"]
+            if "angle" in frame:
+                self.obj.rotation_euler = (0, math.radians(90), math.radians(frame["angle"]))
+            if "light_position" in frame:
+                self.light.location = frame["light_position"]
+            if frame.get("temperature") in temp_colors:
+                self.light.data.color = temp_colors[frame["temperature"]]
+
+            # Calcula a anotação antes do render e sorteia outra posição enquanto o objeto
+            # estiver fora da imagem ou cortado além de min_visibility
+            bbox = self.place_object(plan, subframe_count, random_moves)
+            if bbox is None:
+                manifest.mark_done(subframe_count, params, [])
+                self.telemetry.frame_dropped(subframe_count)
+                continue
+            
+            if "material" in frame:
+                for material in materials:
+                    if material != frame["material"]:
+                        self.replace_material(self.obj, self.obj.data, bpy.data.materials[material], bpy.data.materials[frame["material"]])
+
+            file_name = f"{prefix}_{subframe_count:04d}{bpy.context.scene.render.file_extension}"
+            file_path = os.path.join(base_path, file_name)
+            annotation_path = annotations_dir / f"{Path(file_path).stem}.txt"
+            # Sem anotação (objeto fora da imagem) o frame só tem a imagem
+            annotation_line = self.annotation_line(self.obj, bbox=bbox)
+            outputs = [file_path, str(annotation_path)] if annotation_line is not None else [file_path]
+
+            if baker is not None:
+                # A anotação vem da mesma pose gravada no keyframe
+                self.write_annotations(self.obj, file_path, annotations_dir, bbox=bbox)
+                baker.key(self.obj, ("location", "rotation_euler"), subframe_count)
+                baker.key(self.camera.data, ("lens",), subframe_count)
+                baker.key(self.light, ("location",), subframe_count)
+                baker.key(self.light.data, ("color",), subframe_count)
+                baked.setdefault(frame.get("material"), []).append((subframe_count, params, outputs))
+                continue
+
+            # O render já sincroniza a cena; só redesenha a janela quando há interface
+            redraw_viewport()
+
+            bpy.context.scene.render.filepath = file_path
+
+            if writer is not None:
+                # Copia os pixels e deixa a codificação e a escrita para as threads do writer
+                bpy.ops.render.render()
+                settings = encode_settings(bpy.context.scene, self.letterbox, subframe_count)
+                save_blender_color(file_path, settings)
+                pixels = None if settings["blender_color"] else read_render_pixels(bpy.context.scene)
+                writer.submit(
+                    subframe_count, write_frame, file_path, pixels,
+                    settings, str(annotation_path), annotation_line
+                )
+                written[subframe_count] = (params, outputs)
+                for written_index in writer.completed():
+                    manifest.mark_done(written_index, *written.pop(written_index))
+                self.telemetry.frame_done(subframe_count)
+                continue
+
+            if padded:
+                # Sem writer, as bordas são adicionadas e a imagem gravada aqui mesmo
+                bpy.ops.render.render()
+                write_frame(
+                    file_path, read_render_pixels(bpy.context.scene), encode_settings(bpy.context.scene, self.letterbox, subframe_count),
+                    str(annotation_path), annotation_line
+                )
+                manifest.mark_done(subframe_count, params, outputs)
+                self.telemetry.frame_done(subframe_count)
+                continue
+
+            # Renderiza a imagem
+            bpy.ops.render.render(write_still=True)
+
+            # Salva a anotação YOLO na pasta separada
+            self.write_annotations(self.obj, file_path, annotations_dir, bbox=bbox)
+
+            manifest.mark_done(subframe_count, params, outputs)
+            self.telemetry.frame_done(subframe_count)
+
+        # O material não pode ser animado, então cada material é renderizado em sua própria sequência
+        if baker is not None:
+            for material, frames in baked.items():
+                if material is not None:
+                    for other in materials:
+                        if other != material:
+                            self.replace_material(self.obj, self.obj.data, bpy.data.materials[other], bpy.data.materials[material])
+                baker.render([frame_info[0] for frame_info in frames], os.path.join(base_path, f"{prefix}_"))
+                for subframe_count, params, outputs in frames:
+                    manifest.mark_done(subframe_count, params, outputs)
+                self.telemetry.batch_done([frame_info[0] for frame_info in frames])
+            baker.clear()
+
+        if writer is not None:
+            for written_index in writer.flush():
+                manifest.mark_done(written_index, *written.pop(written_index))
+
+        if own_telemetry:
+            self.telemetry.finish()
+            self.telemetry = None
         bpy.context.view_layer.update()
-        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
-
-# Exemplo de uso
-
-datasetGenerator = DatasetGenerator(
-    object=bpy.data.objects["Cylinder"],
-    plane_materials=["Fabric-03"]
-)
-
-# Dataset 1: Rotations
-temp_colors = {
-    4500: (1.0, 0.85, 0.7),
-}
-
-light_positions = [
-    (0.6, 0.6, 2),
-]
-
-lens_values = [50]
-cylinder_angles = list(range(0, 360, 1))
-base_path = "/home/julia/Downloads/dataset_1"
-
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 2: Lens Variations
-temp_colors = {
-    4500: (1.0, 0.85, 0.7),
-}
-
-light_positions = [
-    (0.6, 0.6, 2),
-]
-
-lens_values = [20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 85, 90]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_2"
-
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 3: Light Variations (position)
-temp_colors = {
-    4500: (1.0, 0.85, 0.7),
-}
-
-light_positions = [
-    (0.7, 0.7, 2),
-    (0.7, -0.7, 2),
-    (-0.7, 0.7, 2),
-    (-0.7, -0.7, 2),
-    (0.0, 0.0, 2),
-    (0.7, 0.0, 2),
-    (-0.7, 0.0, 2),
-    (0.0, 0.7, 2),
-    (0.0, -0.7, 2),
-    (0.4, 0.4, 2),
-    (-0.4, -0.4, 2),
-    (0.4, -0.4, 2),
-    (-0.4, 0.4, 2),
-    (0.3, -0.6, 2),
-    (-0.3, 0.6, 2),
-]
-
-lens_values = [50]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_3"
-
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 4: Light Variations (temperatures)
-temp_colors = {
-    3000: (1.0, 0.76, 0.64),
-    3400: (1.0, 0.79, 0.66),
-    3800: (1.0, 0.81, 0.68),
-    4200: (1.0, 0.83, 0.69),
-    4500: (1.0, 0.85, 0.70),
-    4800: (1.0, 0.89, 0.74),
-    5100: (1.0, 0.92, 0.78),
-    5400: (1.0, 0.95, 0.84),
-    5700: (1.0, 0.97, 0.90),
-    6000: (1.0, 0.99, 0.96),
-    6500: (1.0, 1.0, 1.0),
-    6800: (0.94, 0.97, 1.0),
-    7100: (0.91, 0.95, 1.0),
-    7500: (0.88, 0.93, 1.0),
-    8000: (0.85, 0.92, 1.0)
-}
-
-light_positions = [
-    (0.6, 0.6, 2),
-]
-
-lens_values = [50]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_4"
-
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 5: Light Variations (positions and temperatures)
-
-temp_colors = {
-    3000: (1.0, 0.76, 0.64),
-    3800: (1.0, 0.81, 0.68),
-    4800: (1.0, 0.89, 0.74),
-    5100: (1.0, 0.92, 0.78),
-    6500: (1.00, 1.00, 1.00),
-}
-
-light_positions = [
-    (-0.7, -0.7, 2),
-    (0.7, -0.7, 2),
-    (-0.7, 0.7, 2)
-]
-
-lens_values = [50]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_5"
-
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 6: Light and Lens Variations (positions)
-temp_colors = {
-    4500: (1.0, 0.85, 0.7),
-}
-
-light_positions = [
-    (0.6, 0.6, 2),
-    (0.6, -0.6, 2),
-    (-0.6, 0.6, 2),
-]
-
-lens_values = [ 30, 35, 45, 55, 65]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_6"
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 7: Light and Lens Variations (temperatures)
-temp_colors = {
-    3000: (1.0, 0.76, 0.64),
-    4500: (1.0, 0.85, 0.7),
-    6500: (1.0, 1.0, 1.0),
-}
-light_positions = [
-    (0.6, 0.6, 2),
-]
-lens_values = [ 30, 35, 45, 55, 65]
-cylinder_angles = list(range(0, 360, 15))
-base_path = "/home/julia/Downloads/dataset_7"
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 8: All Variations
-temp_colors = {
-    3000: (1.0, 0.76, 0.64),
-    4500: (1.0, 0.85, 0.7),
-    6500: (1.0, 1.0, 1.0),
-}
-light_positions = [
-    (0.6, 0.6, 2),
-    (0.6, -0.6, 2),
-    (-0.6, 0.6, 2),
-]
-
-lens_values = [ 35, 45, 55]
-cylinder_angles = list(range(0, 360, 24))
-base_path = "/home/julia/Downloads/dataset_8"
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Fabric-03"]
-)
-
-# Dataset 9: All Variations with two cables
-temp_colors = {
-    3000: (1.0, 0.76, 0.64),
-    4500: (1.0, 0.85, 0.7),
-    6500: (1.0, 1.0, 1.0),
-}
-light_positions = [
-    (0.6, 0.6, 2),
-    (0.6, -0.6, 2),
-    (-0.6, 0.6, 2),
-]
-
-lens_values = [ 35, 45, 55]
-cylinder_angles = list(range(0, 360, 24))
-base_path = "/home/julia/Downloads/dataset_9"
-datasetGenerator.render(
-    prefix="cylinder",
-    base_path=base_path,
-    lens_values=lens_values,
-    cylinder_angles=cylinder_angles,
-    temp_colors=temp_colors,
-    light_positions=light_positions,
-    random_moves=True,
-    cable_materials=["Plastic-01", "Plastic-02"]
-)
\ No newline at end of file
+        redraw_viewport()
+
+# Exemplo de uso:
+#   blender -b cena.blend -P generate.py -- --output-dir /dados/cylinder --seed 42 --shard-index K --shard-count N
+# Os datasets são descritos em scenarios/cylinder.json (python datasetGenerator/variationPlan.py mostra o tamanho de cada um)
+if __name__ == "__main__":
+    args = parse_run_args(
+        sys.argv,
+        default_scenario=str(Path(__file__).resolve().parent.parent / "scenarios" / "cylinder.json"),
+        description="Gera os datasets do cilindro descritos no cenário."
+    )
+    scenario = load_scenario(args.scenario)
+    output_dir = resolve_output_dir(args, scenario)
+
+    datasetGenerator = DatasetGenerator(
+        object=bpy.data.objects[scenario.settings.get("object", "Cylinder")],
+        plane_materials=scenario.settings.get("plane_materials", ["Fabric-03"]),
+        shard_manager=ShardManager(args.shard_index, args.shard_count),
+        seed=args.seed if args.seed is not None else scenario.seed,
+        animation=args.animation,
+        profile=args.profile,
+        write_workers=args.write_workers,
+        image_format=resolve_output_format(args, scenario),
+        letterbox=resolve_letterbox(args, scenario)
+    )
+
+    shard_manager = datasetGenerator.shard_manager
+    datasetGenerator.telemetry = Telemetry(
+        sum(len(shard_manager.frame_indices(len(plan))) for plan in scenario.plans),
+        directory=args.telemetry_dir if args.telemetry_dir is not None else output_dir,
+        shard_index=shard_manager.shard_index
+    )
+
+    for plan in scenario.plans:
+        plan.settings.setdefault("base_path", os.path.join(output_dir, plan.name))
+        datasetGenerator.render_plan(plan)
+    datasetGenerator.telemetry.finish()
@@ -0,0 +1,231 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Índice binário das anotações YOLO de um dataset, lido com memória mapeada:
+#   boxes.npy   float32 (caixas, 5): classe, x_center, y_center, largura, altura
+#   offsets.npy int64 (imagens + 1): as caixas da imagem i são boxes[offsets[i]:offsets[i + 1]]
+#   status.npy  int8 (imagens): LABEL_OK, LABEL_MISSING ou LABEL_MALFORMED
+#   paths.txt   caminho absoluto de cada imagem, na ordem do índice
+# Uso: python label_index.py build /dados/instruments    (índice em /dados/instruments/.label_index)
+#      python label_index.py build /dados/instruments --index /dados/instruments_index
+#      python label_index.py stats --index /dados/instruments_index
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp")
+
+# Pasta padrão do índice, dentro da pasta do dataset
+INDEX_DIR = ".label_index"
+
+LABEL_OK = 0
+LABEL_MISSING = 1
+LABEL_MALFORMED = 2
+
+# A anotação pode estar ao lado da imagem (main.py), em annotations/ (generate.py e capture.py)
+# ou em labels/ no lugar de images/ (format_dataset.py)
+def label_path_for(image_path):
+    folder, filename = os.path.split(image_path)
+    stem = os.path.splitext(filename)[0] + ".txt"
+    candidates = [os.path.join(folder, stem), os.path.join(folder, "annotations", stem)]
+    parts = folder.split(os.sep)
+    if "images" in parts:
+        position = len(parts) - 1 - parts[::-1].index("images")
+        candidates.append(os.sep.join(parts[:position] + ["labels"] + parts[position + 1:] + [stem]))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+# As máscaras de instância (<frame>_mask.png, main.py --masks) não são imagens do dataset
+def find_images(folder):
+    image_paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        image_paths.extend(
+            os.path.join(root, file) for file in sorted(files)
+            if file.lower().endswith(IMAGE_EXTENSIONS) and not file.endswith("_mask.png")
+        )
+    return image_paths
+
+# Use this function to read one YOLO label file; returns the (n, 5) boxes and the status. Lines with another
+# number of fields or with non-numeric values are skipped and mark the file as malformed
+def read_label_file(label_path):
+    if label_path is None:
+        return np.empty((0, 5), dtype=np.float32), LABEL_MISSING
+    with open(label_path) as f:
+        rows = [line.split() for line in f if line.strip()]
+    # Caso comum: todas as linhas têm 5 campos e o arquivo vira um único array
+    status = LABEL_OK if all(len(row) == 5 for row in rows) else LABEL_MALFORMED
+    rows = [row for row in rows if len(row) == 5]
+    try:
+        return np.array(rows, dtype=np.float32).reshape(-1, 5), status
+    except ValueError:
+        valid = []
+        for row in rows:
+            try:
+                valid.append([float(value) for value in row])
+            except ValueError:
+                pass
+        return np.array(valid, dtype=np.float32).reshape(-1, 5), LABEL_MALFORMED
+
+# Lê as anotações de um lote de imagens (executado em cada processo de build_index)
+def parse_labels(image_paths):
+    return [read_label_file(label_path_for(image_path)) for image_path in image_paths]
+
+# Use this function once per dataset (and again after the labels change); labels are parsed on every core
+# and packed into the index folder, by default <folder>/.label_index. Paths are stored as absolute paths
+def build_index(folder, index_dir=None, workers=None, chunk_size=512):
+    if index_dir is None:
+        index_dir = os.path.join(folder, INDEX_DIR)
+    image_paths = find_images(os.path.abspath(folder))
+    chunks = [image_paths[start:start + chunk_size] for start in range(0, len(image_paths), chunk_size)]
+    boxes, status, counts = [], [], []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(parse_labels, chunks):
+            for image_boxes, image_status in results:
+                boxes.append(image_boxes)
+                status.append(image_status)
+                counts.append(len(image_boxes))
+
+    os.makedirs(index_dir, exist_ok=True)
+    offsets = np.zeros(len(image_paths) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    np.save(os.path.join(index_dir, "boxes.npy"), np.concatenate(boxes) if boxes else np.empty((0, 5), dtype=np.float32))
+    np.save(os.path.join(index_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(index_dir, "status.npy"), np.array(status, dtype=np.int8))
+    with open(os.path.join(index_dir, "paths.txt"), "w") as f:
+        f.write("".join(f"{path}\n" for path in image_paths))
+    print(f"{len(image_paths)} imagens, {int(offsets[-1])} caixas indexadas em {index_dir}")
+
+class LabelIndex:
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.boxes = np.load(os.path.join(index_dir, "boxes.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode="r")
+        self.status = np.load(os.path.join(index_dir, "status.npy"), mmap_mode="r")
+        self._paths = None
+        self._positions = None
+
+    def __len__(self):
+        return len(self.status)
+
+    # Os caminhos só são lidos quando necessários
+    @property
+    def paths(self):
+        if self._paths is None:
+            with open(os.path.join(self.index_dir, "paths.txt")) as f:
+                self._paths = f.read().splitlines()
+        return self._paths
+
+    # Use this function to get the position of an image in the index, or None if it was not indexed
+    def position(self, image_path):
+        if self._positions is None:
+            self._positions = {path: i for i, path in enumerate(self.paths)}
+        return self._positions.get(os.path.abspath(image_path))
+
+    # Linhas de boxes.npy que pertencem à imagem i
+    def row_slice(self, i):
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    # Use this function instead of parsing the .txt: returns the (n, 5) boxes of image i
+    def boxes_for(self, i):
+        return self.boxes[self.row_slice(i)]
+
+    # Use this function to get, for every box, the index of its image
+    def image_of_boxes(self):
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+
+    # Caixas com algum canto fora de [0, 1] ou com tamanho não positivo
+    def out_of_range(self):
+        _, x_center, y_center, width, height = np.asarray(self.boxes).T
+        return (
+            (x_center - width / 2 < 0) | (x_center + width / 2 > 1)
+            | (y_center - height / 2 < 0) | (y_center + height / 2 > 1)
+            | (width <= 0) | (height <= 0)
+        )
+
+    # Use this function to compute the dataset statistics without touching the label files
+    def stats(self, percentiles=(1, 5, 50, 95, 99)):
+        boxes = np.asarray(self.boxes)
+        counts = np.diff(self.offsets)
+        classes, x_center, y_center, width, height = boxes.T
+
+        out_of_range = self.out_of_range()
+        images_out_of_range = np.unique(self.image_of_boxes()[out_of_range])
+        valid = (width > 0) & (height > 0)
+        area = width[valid] * height[valid]
+        aspect = width[valid] / height[valid]
+
+        def distribution(values):
+            if len(values) == 0:
+                return {}
+            return {f"p{p}": round(float(v), 6) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+
+        class_ids, class_counts = np.unique(classes.astype(np.int64), return_counts=True)
+        return {
+            "images": len(self),
+            "boxes": int(len(boxes)),
+            "classes": {int(class_id): int(count) for class_id, count in zip(class_ids, class_counts)},
+            "boxes_per_image": distribution(counts),
+            "area": distribution(area),
+            "width": distribution(width[valid]),
+            "height": distribution(height[valid]),
+            "aspect": distribution(aspect),
+            "missing_labels": int(np.count_nonzero(self.status == LABEL_MISSING)),
+            "empty_labels": int(np.count_nonzero((counts == 0) & (self.status != LABEL_MISSING))),
+            "malformed_labels": int(np.count_nonzero(self.status == LABEL_MALFORMED)),
+            "out_of_range_boxes": int(np.count_nonzero(out_of_range)),
+            "out_of_range_images": int(len(images_out_of_range)),
+        }
+
+# Use this function in the label readers (contact_sheet.py, draw_bounding_box.py, teste.py): the boxes and the
+# status of an image come from the index when it has the image, and from its .txt otherwise.
+# The index is a snapshot: rebuild it after editing labels
+class LabelReader:
+    def __init__(self, index_dir=None):
+        self.index = None
+        if index_dir is not None and os.path.exists(os.path.join(index_dir, "offsets.npy")):
+            self.index = LabelIndex(index_dir)
+
+    # Use this function to read the labels of a dataset folder, with its default index if it was built
+    @classmethod
+    def for_folder(cls, folder, index_dir=None):
+        return cls(index_dir if index_dir is not None else os.path.join(folder, INDEX_DIR))
+
+    # Returns the (n, 5) boxes (class, x_center, y_center, width, height) and the status of an image
+    def read(self, image_path):
+        if self.index is not None:
+            i = self.index.position(image_path)
+            if i is not None:
+                return np.asarray(self.index.boxes_for(i)), int(self.index.status[i])
+        return read_label_file(label_path_for(image_path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Cria o índice das anotações de uma pasta")
+    build_parser.add_argument("folder")
+    build_parser.add_argument("--index", default=None, help=f"Pasta do índice (padrão: <pasta>/{INDEX_DIR})")
+    build_parser.add_argument("--workers", type=int, default=None)
+    stats_parser = subparsers.add_parser("stats", help="Mostra as estatísticas do dataset a partir do índice")
+    stats_parser.add_argument("--index", required=True, help="Pasta do índice")
+    stats_parser.add_argument("--output", default=None, help="Arquivo JSON com as estatísticas")
+    stats_parser.add_argument("--list-problems", action="store_true", help="Lista as imagens sem anotação ou com caixas fora da imagem")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.folder, args.index, args.workers)
+    else:
+        index = LabelIndex(args.index)
+        stats = index.stats()
+        print(json.dumps(stats, indent=2))
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(stats, f, indent=2)
+        if args.list_problems:
+            for i in np.flatnonzero(index.status != LABEL_OK):
+                print(f"{'sem anotação' if index.status[i] == LABEL_MISSING else 'linha inválida'}\t{index.paths[i]}")
+            for i in np.unique(index.image_of_boxes()[index.out_of_range()]):
+                print(f"fora da imagem\t{index.paths[i]}")
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# Cache das imagens com letterbox, fora do laço interativo do anotador.
+# Cada imagem é guardada como <hash do conteúdo>_<altura>x<largura>.png, então renomear ou copiar a origem
+# não invalida o cache, e formatos diferentes convivem na mesma pasta.
+# Uso: python letterbox_cache.py --images ../dataset/images --cache ../dataset/cache --shape 640 640
+
+CACHE_INDEX = "cache_index.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+def letterbox(img, new_shape=(640, 640), color=(174, 173, 28)):
+    shape = img.shape[:2]  # (h, w)
+    # Imagens geradas já no tamanho de treino (--training-size) não precisam ser redimensionadas
+    if shape == tuple(new_shape):
+        return img, 1.0, (0, 0)
+    ratio = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    new_unpadded = (int(round(shape[1] * ratio)), int(round(shape[0] * ratio)))
+    img_resized = cv2.resize(img, new_unpadded, interpolation=cv2.INTER_LINEAR)
+
+    dw = new_shape[1] - new_unpadded[0]
+    dh = new_shape[0] - new_unpadded[1]
+    top, bottom = dh // 2, dh - dh // 2
+    left, right = dw // 2, dw - dw // 2
+
+    img_padded = cv2.copyMakeBorder(img_resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img_padded, ratio, (left, top)
+
+def cached_path(cache_dir, content_hash, new_shape):
+    return os.path.join(cache_dir, f"{content_hash}_{new_shape[0]}x{new_shape[1]}.png")
+
+# Use this function to letterbox one image through the cache; the source is read once, both for the hash
+# and for decoding. Returns (source path, content hash)
+def cache_image(img_path, cache_dir, new_shape=(640, 640)):
+    with open(img_path, "rb") as f:
+        data = f.read()
+    content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+    path = cached_path(cache_dir, content_hash, new_shape)
+    if not os.path.exists(path):
+        img, _, _ = letterbox(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), new_shape=new_shape)
+        # Nome temporário único por processo, renomeado ao final: nenhum leitor vê um PNG pela metade
+        temporary_path = f"{path}.{os.getpid()}.tmp.png"
+        cv2.imwrite(temporary_path, img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        os.replace(temporary_path, path)
+    return img_path, content_hash
+
+# Índice caminho -> (tamanho, data de modificação, hash), para não reler imagens que não mudaram
+class LetterboxCache:
+    def __init__(self, cache_dir, new_shape=(640, 640)):
+        self.cache_dir = cache_dir
+        self.new_shape = tuple(new_shape)
+        self.index_path = os.path.join(cache_dir, CACHE_INDEX)
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def signature(self, img_path):
+        stat = os.stat(img_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    # Use this function to get the cached file of an image, or None if it was not preprocessed yet
+    def lookup(self, img_path):
+        entry = self.index.get(os.path.abspath(img_path))
+        if entry is None or entry["signature"] != self.signature(img_path):
+            return None
+        path = cached_path(self.cache_dir, entry["hash"], self.new_shape)
+        return path if os.path.exists(path) else None
+
+    def record(self, img_path, content_hash):
+        self.index[os.path.abspath(img_path)] = {"signature": self.signature(img_path), "hash": content_hash}
+
+    # Use this function in the annotator: reads the letterboxed image from the cache, preprocessing it on a miss
+    def load(self, img_path):
+        path = self.lookup(img_path)
+        if path is None:
+            _, content_hash = cache_image(img_path, self.cache_dir, self.new_shape)
+            self.record(img_path, content_hash)
+            path = cached_path(self.cache_dir, content_hash, self.new_shape)
+        return cv2.imread(path)
+
+    def save(self):
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(temporary_path, self.index_path)
+
+    # Use this function to preprocess a whole folder on every core; images already in the cache are skipped
+    def preprocess_folder(self, image_folder, workers=None):
+        paths = [
+            os.path.join(image_folder, filename)
+            for filename in sorted(os.listdir(image_folder))
+            if filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        pending = [path for path in paths if self.lookup(path) is None]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(cache_image, pending, [self.cache_dir] * len(pending), [self.new_shape] * len(pending), chunksize=16)
+            for img_path, content_hash in results:
+                self.record(img_path, content_hash)
+        self.save()
+        print(f"{len(paths)} imagens: {len(pending)} processadas, {len(paths) - len(pending)} já no cache ({self.cache_dir})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", default="../dataset/images")
+    parser.add_argument("--cache", default="../dataset/cache")
+    parser.add_argument("--shape", type=int, nargs=2, default=[640, 640], metavar=("ALTURA", "LARGURA"))
+    parser.add_argument("--workers", type=int, default=None, help="Processos (padrão: todos os núcleos)")
+    args = parser.parse_args()
+    LetterboxCache(args.cache, args.shape).preprocess_folder(args.images, args.workers)
@@ -1,9 +1,17 @@
 import os
+import json
 import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Extensões válidas para imagens
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"}
 
+# Índice das imagens já organizadas, gravado na pasta de destino:
+# caminho relativo na origem -> tamanho, data de modificação, hash do conteúdo e nome no destino
+INDEX_FILE = ".organize_index.json"
+
 def is_image(filename):
     return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
 
@@ -11,22 +19,120 @@ def sanitize_filename(path):
     # Remove caracteres inválidos e substitui separadores
     return path.replace(os.sep, "_").replace(":", "").replace(" ", "_")
 
-def process_images(source_dir, destination_dir):
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_index(index_path):
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+# Grava o índice em um arquivo temporário e renomeia, para que uma execução interrompida não o corrompa
+def save_index(index_path, index):
+    temporary_path = index_path + ".tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(index, f)
+    os.replace(temporary_path, index_path)
+
+def remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+# O destino é removido antes: se ele for um hardlink de uma duplicata, a outra cópia não é alterada
+def copy_image(source_path, destination_path):
+    remove_file(destination_path)
+    shutil.copy2(source_path, destination_path)
+    return "copiadas"
+
+# Duplicatas byte a byte viram hardlinks da primeira cópia (ou cópias, se o sistema de arquivos não suportar)
+def link_image(canonical_path, source_path, destination_path):
+    remove_file(destination_path)
+    try:
+        os.link(canonical_path, destination_path)
+        return "ligadas"
+    except OSError:
+        shutil.copy2(source_path, destination_path)
+        return "copiadas"
+
+def process_images(source_dir, destination_dir, workers=8):
     os.makedirs(destination_dir, exist_ok=True)
+    index_path = os.path.join(destination_dir, INDEX_FILE)
+    index = load_index(index_path)
 
+    # Um stat por imagem; imagens com o mesmo tamanho e data de modificação do índice são puladas
+    images = {}
+    changed = []
     for root, dirs, files in os.walk(source_dir):
         for file in files:
             if is_image(file):
                 full_path = os.path.join(root, file)
                 relative_path = os.path.relpath(full_path, start=source_dir)
-                sanitized_name = sanitize_filename(relative_path)
-                destination_path = os.path.join(destination_dir, sanitized_name)
+                stat = os.stat(full_path)
+                images[relative_path] = {
+                    "source": full_path,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "destination": sanitize_filename(relative_path),
+                }
+                previous = index.get(relative_path)
+                if previous is None or previous["size"] != stat.st_size or previous["mtime_ns"] != stat.st_mtime_ns:
+                    changed.append(relative_path)
+
+    # Imagens que saíram da origem também saem do destino
+    removed = [relative_path for relative_path in index if relative_path not in images]
+    for relative_path in removed:
+        remove_file(os.path.join(destination_dir, index.pop(relative_path)["destination"]))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # O hash só é calculado para as imagens novas ou alteradas
+        for relative_path, content_hash in zip(changed, executor.map(lambda path: file_hash(images[path]["source"]), changed)):
+            images[relative_path]["hash"] = content_hash
+        for relative_path, entry in images.items():
+            if "hash" not in entry:
+                entry["hash"] = index[relative_path]["hash"]
+
+        # Primeira imagem de cada conteúdo (as que não mudaram têm preferência, pois já estão no destino)
+        canonical = {}
+        changed_paths = set(changed)
+        for relative_path, entry in images.items():
+            if relative_path not in changed_paths:
+                canonical.setdefault(entry["hash"], entry["destination"])
+        copies, links = [], []
+        for relative_path in changed:
+            entry = images[relative_path]
+            destination_path = os.path.join(destination_dir, entry["destination"])
+            if entry["hash"] in canonical:
+                links.append((os.path.join(destination_dir, canonical[entry["hash"]]), entry["source"], destination_path))
+            else:
+                canonical[entry["hash"]] = entry["destination"]
+                copies.append((entry["source"], destination_path))
+
+        # As cópias terminam antes dos links, que apontam para elas
+        results = list(executor.map(lambda job: copy_image(*job), copies))
+        results += list(executor.map(lambda job: link_image(*job), links))
 
-                shutil.copy2(full_path, destination_path)
-                print(f"Imagem copiada: {destination_path}")
+    for relative_path, entry in images.items():
+        index[relative_path] = {key: entry[key] for key in ("size", "mtime_ns", "hash", "destination")}
+    save_index(index_path, index)
 
-# Exemplo de uso
-source_folder = "../validation"
-destination_folder = "../validation_organized"
+    print(
+        f"{len(images)} imagens: {results.count('copiadas')} copiadas, {results.count('ligadas')} duplicadas ligadas, "
+        f"{len(images) - len(changed)} sem mudança, {len(removed)} removidas | destino: {destination_dir}"
+    )
 
-process_images(source_folder, destination_folder)
+# Exemplo de uso: python organize.py --source ../validation --destination ../validation_organized
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="../validation")
+    parser.add_argument("--destination", default="../validation_organized")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    process_images(args.source, args.destination, args.workers)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Executa o mesmo script em N processos headless do Blender, cada um renderizando um shard dos frames.
+# Argumentos desconhecidos são repassados a cada processo (ex.: --output-dir, --scenario, --seed):
+#   python render_shards.py --blend cena.blend --script ../datasetGenerator/main.py --workers 8 --output-dir /dados/out
+def launch_shards(blender, blend_file, script, workers, threads=None, log_dir=None, extra_args=None):
+    if extra_args is None:
+        extra_args = []
+    if threads is None:
+        # Divide os núcleos entre os processos para não sobrecarregar a máquina
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    if log_dir is not None:
+        os.makedirs(log_dir, exist_ok=True)
+
+    processes = []
+    for shard_index in range(workers):
+        command = [
+            blender, "-b", blend_file,
+            "-t", str(threads),
+            "-P", script,
+            "--",
+            "--shard-index", str(shard_index),
+            "--shard-count", str(workers),
+            *extra_args,
+        ]
+        if log_dir is not None:
+            log_file = open(os.path.join(log_dir, f"shard_{shard_index}.log"), "w")
+        else:
+            log_file = None
+        processes.append((shard_index, subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT), log_file))
+
+    failed = []
+    for shard_index, process, log_file in processes:
+        process.wait()
+        if log_file is not None:
+            log_file.close()
+        if process.returncode != 0:
+            failed.append(shard_index)
+
+    if failed:
+        print(f"Shards com erro: {failed}")
+    else:
+        print(f"{workers} shards concluídos.")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renderiza um cenário dividido entre vários processos do Blender.")
+    parser.add_argument("--blender", default="blender", help="Executável do Blender")
+    parser.add_argument("--blend", required=True, help="Arquivo .blend da cena")
+    parser.add_argument("--script", required=True, help="Script de geração (ex.: datasetGenerator/main.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Número de processos")
+    parser.add_argument("--threads", type=int, default=None, help="Threads de render por processo")
+    parser.add_argument("--log-dir", default=None, help="Pasta para os logs de cada shard")
+    args, extra_args = parser.parse_known_args()
+
+    failed = launch_shards(args.blender, args.blend, args.script, args.workers, args.threads, args.log_dir, extra_args)
+    sys.exit(1 if failed else 0)
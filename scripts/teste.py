@@ -1,9 +1,9 @@
 import cv2
 import os
 import glob
+from label_index import LabelReader, LABEL_MISSING
 
 images_dir = "C:/Users/nrc2/Downloads/Capturas_Blender"
-annotations_dir = os.path.join(images_dir, "annotations")
 
 image_files = glob.glob(os.path.join(images_dir, "*.png"))
 
@@ -11,6 +11,9 @@ if not image_files:
     print("Nenhuma imagem encontrada na pasta especificada.")
     exit()
 
+# Lê as anotações pelo índice de label_index.py, se ele foi criado; senão, pelos .txt de annotations/
+reader = LabelReader.for_folder(images_dir)
+
 for image_file in image_files:
 
     image = cv2.imread(image_file)
@@ -21,23 +24,12 @@ for image_file in image_files:
 
   
     base_name = os.path.splitext(os.path.basename(image_file))[0]
-    annotation_file = os.path.join(annotations_dir, base_name + ".txt")
-
-    if os.path.exists(annotation_file):
-        with open(annotation_file, "r") as f:
-            lines = f.readlines()
-
-        for line in lines:
-            parts = line.strip().split()
-            if len(parts) != 5:
-                continue
+    boxes, status = reader.read(image_file)
 
+    if status != LABEL_MISSING:
+        for class_id, x_center_norm, y_center_norm, width_norm, height_norm in boxes:
             # Formato YOLO: <class_id> <x_center> <y_center> <width> <height>
-            class_id, x_center_norm, y_center_norm, width_norm, height_norm = parts
-            x_center_norm = float(x_center_norm)
-            y_center_norm = float(y_center_norm)
-            width_norm = float(width_norm)
-            height_norm = float(height_norm)
+            class_id = int(class_id)
 
             # Converte as coordenadas normalizadas para pixels
             x_center = int(x_center_norm * w)